@@ -0,0 +1,61 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from rest_framework.permissions import SAFE_METHODS
+
+from api.metrics import profiling, timed
+
+ASYNC_READ_VIEWS = (
+    'recipes-list',
+    'recipes-detail',
+    'tags-list',
+    'tags-detail',
+    'ingredients-list',
+    'ingredients-detail',
+)
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.ASYNC_READ_THREADS,
+    thread_name_prefix='async-read'
+)
+
+
+def render_view(view, request, *args, **kwargs):
+    close_old_connections()
+    try:
+        with profiling():
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render'):
+                with timed('render_seconds'):
+                    response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_read_view(view):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in SAFE_METHODS:
+            return await sync_to_async(view)(request, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, partial(
+                contextvars.copy_context().run,
+                render_view, view, request, *args, **kwargs
+            )
+        )
+    return wrapper
+
+
+def async_read_urls(urls):
+    if settings.SERVER_MODE != 'asgi':
+        return urls
+    for url in urls:
+        if url.name in ASYNC_READ_VIEWS:
+            url.callback = async_read_view(url.callback)
+    return urls
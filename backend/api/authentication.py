@@ -0,0 +1,117 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from copy import copy
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from api.cache import is_shared_cache
+from api.metrics import registry
+
+
+class TokenCache:
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            token, expires = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return token
+
+    def set(self, key, token):
+        with self.lock:
+            self.entries[key] = (token, time.monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+token_cache = TokenCache(
+    settings.AUTH_TOKEN_CACHE_SIZE, settings.AUTH_TOKEN_LOCAL_TTL
+)
+
+
+def get_cache_key(key):
+    return 'auth-token:{}'.format(hashlib.sha256(key.encode()).hexdigest())
+
+
+def forget_tokens(keys):
+    def forget():
+        for key in keys:
+            token_cache.delete(key)
+        cache.delete_many([get_cache_key(key) for key in keys])
+
+    # Until the commit another request can still read the token from the
+    # database and put it back into the cache.
+    transaction.on_commit(forget)
+
+
+def detach(token):
+    token = copy(token)
+    token.user = copy(token.user)
+    return token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def get_token(self, key):
+        model = self.get_model()
+        try:
+            # Cached tokens end up in the shared cache, so the password
+            # hash is left out.
+            token = model.objects.select_related('user').defer(
+                'user__password'
+            ).get(key=key)
+        except model.DoesNotExist:
+            raise AuthenticationFailed(_('Invalid token.'))
+        if not token.user.is_active:
+            raise AuthenticationFailed(_('User inactive or deleted.'))
+        return token
+
+    def authenticate_credentials(self, key):
+        token = token_cache.get(key)
+        if token is not None:
+            registry.count('auth_token_cache', 'local_hit')
+            token = detach(token)
+            return token.user, token
+
+        # A per-process cache can't be cleared in the other workers when the
+        # token is revoked, so only the short-lived LRU is used then.
+        shared = is_shared_cache()
+        token = cache.get(get_cache_key(key)) if shared else None
+        if token is not None:
+            registry.count('auth_token_cache', 'shared_hit')
+        else:
+            registry.count('auth_token_cache', 'miss')
+            token = self.get_token(key)
+            if shared:
+                cache.set(
+                    get_cache_key(key), token,
+                    settings.AUTH_TOKEN_CACHE_TIMEOUT
+                )
+        token_cache.set(key, token)
+        token = detach(token)
+        return token.user, token
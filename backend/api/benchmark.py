@@ -0,0 +1,213 @@
+import base64
+import io
+import random
+import resource
+import time
+from contextlib import contextmanager, nullcontext
+from statistics import mean, quantiles
+from tempfile import TemporaryDirectory
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.cache import local_catalogues
+from api.generator import USER_PREFIX
+from api.search import ingredient_index
+from recipe.models import Ingredient, Recipe, Tag
+from users.models import User
+
+FEED_CURSOR_PAGES = 20
+
+
+def make_image():
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), '#E26C2D').save(buffer, format='PNG')
+    return 'data:image/png;base64,' + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+class Bench:
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.user = User.objects.filter(
+            username__startswith=USER_PREFIX
+        ).annotate(
+            follows=Count('follower')
+        ).order_by('-follows', 'pk').first()
+        if self.user is None:
+            raise LookupError(
+                'Нет сгенерированных данных: выполните generate_data.'
+            )
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.credentials(HTTP_AUTHORIZATION='Token {}'.format(
+            Token.objects.get_or_create(user=self.user)[0].key
+        ))
+        self.recipes = list(Recipe.objects.values_list('pk', flat=True))
+        self.own_recipes = list(
+            self.user.recipes.values_list('pk', flat=True)
+        ) or self.recipes[:1]
+        self.tags = list(Tag.objects.values_list('slug', flat=True))
+        self.tag_ids = list(Tag.objects.values_list('pk', flat=True))
+        self.ingredients = list(
+            Ingredient.objects.values_list('pk', 'name')[:500]
+        )
+        self.image = make_image()
+        self.feed_next = None
+        self.feed_pages = 0
+
+    def recipe_payload(self):
+        return {
+            'name': 'Бенчмарк {}'.format(self.rng.randint(0, 10 ** 9)),
+            'text': 'Рецепт из бенчмарка.',
+            'cooking_time': self.rng.randint(5, 120),
+            'image': self.image,
+            'tags': self.rng.sample(self.tag_ids, 1),
+            'ingredients': [
+                {'id': pk, 'amount': self.rng.randint(1, 500)}
+                for pk, name in self.rng.sample(self.ingredients, 5)
+            ],
+        }
+
+
+def feed(bench):
+    return bench.client.get('/api/recipes/', {
+        'page': bench.rng.randint(1, 20), 'limit': 6
+    })
+
+
+def feed_cursor(bench):
+    # Scroll the feed by its next cursors like the frontend does, starting
+    # over from the first page every FEED_CURSOR_PAGES pages.
+    if bench.feed_next is None or bench.feed_pages >= FEED_CURSOR_PAGES:
+        bench.feed_next = '/api/recipes/?limit=6'
+        bench.feed_pages = 0
+    response = bench.client.get(bench.feed_next)
+    bench.feed_next = (
+        response.json()['next'] if response.status_code == 200 else None
+    )
+    bench.feed_pages += 1
+    return response
+
+
+def feed_filtered(bench):
+    return bench.client.get('/api/recipes/', {
+        'tags': bench.rng.sample(bench.tags, 2),
+        'is_favorited': bench.rng.choice(('0', '1')),
+        'limit': 6,
+    })
+
+
+def recipe_detail(bench):
+    return bench.client.get(
+        '/api/recipes/{}/'.format(bench.rng.choice(bench.recipes))
+    )
+
+
+def create_recipe(bench):
+    return bench.client.post(
+        '/api/recipes/', bench.recipe_payload(), format='json'
+    )
+
+
+def update_recipe(bench):
+    return bench.client.patch(
+        '/api/recipes/{}/'.format(bench.rng.choice(bench.own_recipes)),
+        bench.recipe_payload(),
+        format='json'
+    )
+
+
+def subscriptions(bench):
+    return bench.client.get(
+        '/api/users/subscriptions/', {'page': 1, 'recipes_limit': 3}
+    )
+
+
+def download_shopping_cart(bench):
+    return bench.client.get('/api/recipes/download_shopping_cart/')
+
+
+def ingredient_autocomplete(bench):
+    name = bench.rng.choice(bench.ingredients)[1]
+    return bench.client.get(
+        '/api/ingredients/', {'name': name[:bench.rng.randint(1, 4)]}
+    )
+
+
+SCENARIOS = {
+    'feed': (feed, False),
+    'feed_cursor': (feed_cursor, False),
+    'feed_filtered': (feed_filtered, False),
+    'recipe_detail': (recipe_detail, False),
+    'create_recipe': (create_recipe, True),
+    'update_recipe': (update_recipe, True),
+    'subscriptions': (subscriptions, False),
+    'download_shopping_cart': (download_shopping_cart, False),
+    'ingredient_autocomplete': (ingredient_autocomplete, False),
+}
+
+
+def clear_caches():
+    cache.clear()
+    local_catalogues.clear()
+    ingredient_index.clear()
+
+
+def get_peak_rss():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+@contextmanager
+def temporary_media():
+    with TemporaryDirectory() as directory:
+        with override_settings(MEDIA_ROOT=directory):
+            yield
+
+
+def run_request(bench, scenario, writes):
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        if writes:
+            with transaction.atomic():
+                response = scenario(bench)
+                transaction.set_rollback(True)
+        else:
+            response = scenario(bench)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        elapsed = time.perf_counter() - start
+    return elapsed, len(queries), response.status_code < 400
+
+
+def run_scenario(bench, name, iterations, warmup, cold):
+    scenario, writes = SCENARIOS[name]
+    start_rss = get_peak_rss()
+    with temporary_media() if writes else nullcontext():
+        for _ in range(warmup):
+            run_request(bench, scenario, writes)
+        results = []
+        for _ in range(iterations):
+            if cold:
+                clear_caches()
+            results.append(run_request(bench, scenario, writes))
+    latencies = [elapsed * 1000 for elapsed, _, _ in results]
+    percentiles = quantiles(latencies, n=100) if len(latencies) > 1 else (
+        latencies * 99
+    )
+    return {
+        'requests': len(results),
+        'errors': sum(not ok for _, _, ok in results),
+        'p50_ms': round(percentiles[49], 3),
+        'p95_ms': round(percentiles[94], 3),
+        'mean_ms': round(mean(latencies), 3),
+        'queries_per_request': round(
+            mean(queries for _, queries, _ in results), 2
+        ),
+        'peak_rss_delta_mb': round(get_peak_rss() - start_rss, 1),
+    }
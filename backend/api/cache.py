@@ -0,0 +1,104 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.renderers import JSONRenderer
+
+from api.metrics import serialize
+
+local_catalogues = {}
+
+
+def is_shared_cache():
+    return (settings.SERVER_WORKERS == 1
+            or not isinstance(caches['default'], LocMemCache))
+
+
+def get_version(name):
+    return cache.get_or_set(f'version:{name}', time.time, timeout=None)
+
+
+def bump_version(name):
+    transaction.on_commit(
+        lambda: cache.set(f'version:{name}', time.time(), timeout=None)
+    )
+
+
+def make_etag(*parts):
+    return '"{}"'.format(hashlib.md5(repr(parts).encode()).hexdigest())
+
+
+def conditional_response(request, etag, last_modified, render,
+                         use_last_modified=True):
+    last_modified = int(last_modified)
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=last_modified if use_last_modified else None
+    )
+    if response is None:
+        response = render()
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def get_catalogue_payload(name, version, build):
+    local = local_catalogues.get(name)
+    if local and local[0] == version:
+        return local[1]
+    key = f'catalogue:{name}:{version}'
+    payload = cache.get(key)
+    if payload is None:
+        payload = JSONRenderer().render(build())
+        cache.set(key, payload, settings.CATALOGUE_CACHE_TIMEOUT)
+    local_catalogues[name] = (version, payload)
+    return payload
+
+
+def get_cached_representations(instances, make_key, build):
+    keys = {instance.pk: make_key(instance) for instance in instances}
+    cached = cache.get_many(keys.values())
+    missing = [pk for pk, key in keys.items() if key not in cached]
+    if missing:
+        built = {keys[pk]: data for pk, data in build(missing).items()}
+        cache.set_many(built, settings.RECIPE_CACHE_TIMEOUT)
+        cached.update(built)
+    return [
+        cached[keys[instance.pk]] for instance in instances
+        if keys[instance.pk] in cached
+    ]
+
+
+class CatalogueCacheMixin:
+    catalogue_name = None
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params:
+            return super().list(request, *args, **kwargs)
+
+        version = get_version(self.catalogue_name)
+        return conditional_response(
+            request,
+            make_etag(self.catalogue_name, version),
+            version,
+            lambda: HttpResponse(
+                get_catalogue_payload(
+                    self.catalogue_name,
+                    version,
+                    self.get_catalogue
+                ),
+                content_type='application/json'
+            )
+        )
+
+    def get_catalogue(self):
+        return serialize(
+            self.get_serializer(self.get_queryset(), many=True)
+        )
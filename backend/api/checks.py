@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+from api.cache import is_shared_cache
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    if is_shared_cache():
+        return []
+    return [Error(
+        'Кеш хранится в памяти процесса, а воркеров {}: версии каталогов '
+        'и ETag разойдутся между воркерами.'.format(
+            settings.SERVER_WORKERS
+        ),
+        hint='Укажите общий кеш в CACHE_BACKEND и CACHE_LOCATION, '
+             'например memcached.',
+        id='api.E001',
+    )]
@@ -0,0 +1,139 @@
+from operator import itemgetter
+
+from api.metrics import timed
+from api.serializers import (IngredientCreateSerializer, RecipeReadSerializer,
+                             TagSerializers)
+from recipe.models import Recipe, RecipeIngredient, RecipeTag
+from users.models import User
+from users.serializers import UserSerializer, get_followed_ids
+
+image_storage = Recipe._meta.get_field('image').storage
+
+
+class Context:
+    def __init__(self, request):
+        self.request = request
+        self.followed = get_followed_ids(request)
+
+    def absolute(self, url):
+        if self.request is None:
+            return url
+        return self.request.build_absolute_uri(url)
+
+
+def compile_fields(serializer_class, accessors):
+    return tuple(
+        (name, accessors[name]) for name in serializer_class.Meta.fields
+    )
+
+
+def build(fields, row, context):
+    return {name: accessor(row, context) for name, accessor in fields}
+
+
+def column(name):
+    getter = itemgetter(name)
+    return lambda row, context: getter(row)
+
+
+def get_image(row, context):
+    if not row['image']:
+        return None
+    return context.absolute(image_storage.url(row['image']))
+
+
+def get_thumbnails(row, context):
+    return {
+        name: context.absolute(url)
+        for name, url in row['thumbnails'].items()
+    }
+
+
+TAG_FIELDS = compile_fields(TagSerializers, {
+    'id': column('tag__id'),
+    'name': column('tag__name'),
+    'color': column('tag__color'),
+    'slug': column('tag__slug'),
+})
+INGREDIENT_FIELDS = compile_fields(IngredientCreateSerializer, {
+    'id': column('ingredient__id'),
+    'name': column('ingredient__name'),
+    'measurement_unit': column('ingredient__measurement_unit'),
+    'amount': column('amount'),
+})
+AUTHOR_FIELDS = compile_fields(UserSerializer, {
+    'email': column('email'),
+    'id': column('id'),
+    'username': column('username'),
+    'first_name': column('first_name'),
+    'last_name': column('last_name'),
+    'is_subscribed': lambda row, context: row['id'] in context.followed,
+})
+RECIPE_FIELDS = compile_fields(RecipeReadSerializer, {
+    'id': column('id'),
+    'tags': column('tags'),
+    'author': column('author'),
+    'ingredients': column('ingredients'),
+    'is_favorited': lambda row, context: row.get('is_favorited', False),
+    'is_in_shopping_cart': (
+        lambda row, context: row.get('is_in_shopping_cart', False)
+    ),
+    'name': column('name'),
+    'image': get_image,
+    'thumbnails': get_thumbnails,
+    'text': column('text'),
+    'cooking_time': column('cooking_time'),
+})
+RECIPE_COLUMNS = (
+    'id', 'author_id', 'name', 'image', 'thumbnails', 'text', 'cooking_time'
+)
+
+
+def group_by_recipe(rows, fields, context):
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row['recipe_id'], []).append(
+            build(fields, row, context)
+        )
+    return grouped
+
+
+@timed('serialize_seconds')
+def serialize_recipe_rows(queryset, request):
+    context = Context(request)
+    flags = [
+        name for name in ('is_favorited', 'is_in_shopping_cart')
+        if name in queryset.query.annotations
+    ]
+    rows = list(
+        queryset.prefetch_related(None).values(*RECIPE_COLUMNS, *flags)
+    )
+    pks = [row['id'] for row in rows]
+    authors = {
+        row['id']: build(AUTHOR_FIELDS, row, context)
+        for row in User.objects.filter(
+            pk__in={row['author_id'] for row in rows}
+        ).values('id', 'email', 'username', 'first_name', 'last_name')
+    }
+    tags = group_by_recipe(
+        RecipeTag.objects.filter(recipe__in=pks).values(
+            'recipe_id', 'tag__id', 'tag__name', 'tag__color', 'tag__slug'
+        ).order_by('tag__name'),
+        TAG_FIELDS, context
+    )
+    ingredients = group_by_recipe(
+        RecipeIngredient.objects.filter(recipe__in=pks).values(
+            'recipe_id', 'ingredient__id', 'ingredient__name',
+            'ingredient__measurement_unit', 'amount'
+        ).order_by('recipe', 'pk'),
+        INGREDIENT_FIELDS, context
+    )
+    return [
+        build(RECIPE_FIELDS, {
+            **row,
+            'author': authors[row['author_id']],
+            'tags': tags.get(row['id'], []),
+            'ingredients': ingredients.get(row['id'], []),
+        }, context)
+        for row in rows
+    ]
@@ -0,0 +1,12 @@
+from rest_framework import serializers
+
+
+class ThumbnailsField(serializers.ReadOnlyField):
+    def to_representation(self, value):
+        request = self.context.get('request')
+        if request is None:
+            return value
+        return {
+            name: request.build_absolute_uri(url)
+            for name, url in value.items()
+        }
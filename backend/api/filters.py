@@ -1,8 +1,12 @@
+from django.db.models import Exists, OuterRef
 from django_filters import (FilterSet, CharFilter,
                             ModelChoiceFilter, ModelMultipleChoiceFilter,
                             ChoiceFilter)
+from rest_framework.filters import OrderingFilter
 
-from recipe.models import Ingredient, Recipe, Tag
+from api.search import search_ingredients
+from recipe.models import (Favorite, Ingredient, Recipe, RecipeTag,
+                           ShoppingCart, Tag)
 from users.models import User
 
 BOOL_CHOICES = (
@@ -12,12 +16,26 @@ BOOL_CHOICES = (
 
 
 class IngredientFilter(FilterSet):
-    name = CharFilter(field_name='name', lookup_expr='icontains')
+    name = CharFilter(method='get_filter_search')
 
     class Meta:
         model = Ingredient
         fields = ('name',)
 
+    def get_filter_search(self, queryset, name, value):
+        return search_ingredients(queryset, value)
+
+
+class RecipeOrderingFilter(OrderingFilter):
+    aliases = {
+        'trending': '-trending_score',
+        'popular': '-favorites_count',
+    }
+
+    def remove_invalid_fields(self, queryset, fields, view, request):
+        fields = [self.aliases.get(field, field) for field in fields]
+        return super().remove_invalid_fields(queryset, fields, view, request)
+
 
 class RecipeFilter(FilterSet):
     author = ModelChoiceFilter(queryset=User.objects.all(), label='Автор')
@@ -32,21 +50,33 @@ class RecipeFilter(FilterSet):
     tags = ModelMultipleChoiceFilter(label='Тэги',
                                      queryset=Tag.objects.all(),
                                      field_name='tags__slug',
-                                     to_field_name='slug'
+                                     to_field_name='slug',
+                                     method='get_filter_tags'
                                      )
 
     class Meta:
         model = Recipe
         fields = 'author', 'tags'
 
+    def get_filter_tags(self, queryset, name, value):
+        if not value:
+            return queryset
+        return queryset.filter(Exists(
+            RecipeTag.objects.filter(recipe=OuterRef('pk'), tag__in=value)
+        ))
+
     def get_filter_favorite(self, queryset, name, value):
         user = self.request.user
-        if user.is_authenticated and value:
-            return queryset.filter(favorite__user=user)
+        if user.is_authenticated and value == '1':
+            return queryset.filter(Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+            ))
         return queryset
 
     def get_filter_shopping_cart(self, queryset, name, value):
         user = self.request.user
-        if user.is_authenticated and value:
-            return queryset.filter(added_to_shopping_cart__user=user)
+        if user.is_authenticated and value == '1':
+            return queryset.filter(Exists(
+                ShoppingCart.objects.filter(user=user, recipes=OuterRef('pk'))
+            ))
         return queryset
@@ -0,0 +1,153 @@
+import random
+from itertools import accumulate
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from api.importers import (batches, create_recipes, import_ingredients,
+                           import_tags, read_rows)
+from recipe.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                           RecipeTag, ShoppingCart, Tag)
+from users.models import Follow, User
+
+USER_PREFIX = 'bench_'
+PASSWORD = 'bench-password'
+TAGS = (
+    {'name': 'Завтрак', 'color': '#E26C2D', 'slug': 'breakfast'},
+    {'name': 'Обед', 'color': '#49B64E', 'slug': 'lunch'},
+    {'name': 'Ужин', 'color': '#8775D2', 'slug': 'dinner'},
+)
+
+
+class Skewed:
+    def __init__(self, rng, items, exponent=1.1):
+        self.rng = rng
+        self.items = list(items)
+        self.weights = list(accumulate(
+            1 / (rank + 1) ** exponent for rank in range(len(self.items))
+        ))
+
+    def sample(self, count):
+        count = min(count, len(self.items))
+        chosen = set()
+        while len(chosen) < count:
+            chosen.add(self.rng.choices(
+                self.items, cum_weights=self.weights
+            )[0])
+        return chosen
+
+    def choices(self, count):
+        return self.rng.choices(
+            self.items, cum_weights=self.weights, k=count
+        )
+
+
+def clear_generated():
+    User.objects.filter(username__startswith=USER_PREFIX).delete()
+
+
+def ensure_catalogue(batch_size):
+    if not Ingredient.objects.exists():
+        import_ingredients(
+            read_rows(Path(settings.BASE_DIR) / 'data' / 'ingredients.csv'),
+            batch_size
+        )
+    import_tags(TAGS, batch_size)
+
+
+def create_users(count, batch_size):
+    password = make_password(PASSWORD)
+    for batch in batches(range(count), batch_size):
+        User.objects.bulk_create([
+            User(
+                username=f'{USER_PREFIX}{i}',
+                email=f'{USER_PREFIX}{i}@example.com',
+                first_name='Бенч',
+                last_name=str(i),
+                password=password
+            ) for i in batch
+        ], ignore_conflicts=True)
+    return list(User.objects.filter(
+        username__startswith=USER_PREFIX
+    ).order_by('pk').values_list('pk', flat=True))
+
+
+def create_generated_recipes(rng, count, authors, batch_size):
+    tags = list(Tag.objects.values_list('pk', flat=True))
+    ingredients = Skewed(
+        rng, Ingredient.objects.order_by('pk').values_list('pk', flat=True)
+    )
+    created = 0
+    for batch in batches(range(count), batch_size):
+        with transaction.atomic():
+            recipes = create_recipes([
+                Recipe(
+                    author_id=author,
+                    name=f'Рецепт {i}',
+                    text='Сгенерированный рецепт для бенчмарков.',
+                    cooking_time=rng.randint(5, 180),
+                    image='recipes/images/bench.png'
+                )
+                for i, author in zip(batch, authors.choices(len(batch)))
+            ])
+            RecipeTag.objects.bulk_create([
+                RecipeTag(recipe=recipe, tag_id=tag)
+                for recipe in recipes
+                for tag in rng.sample(tags, rng.randint(1, len(tags)))
+            ])
+            RecipeIngredient.objects.bulk_create([
+                RecipeIngredient(
+                    recipe=recipe, ingredient_id=ingredient,
+                    amount=rng.randint(1, 500)
+                )
+                for recipe in recipes
+                for ingredient in ingredients.sample(rng.randint(3, 10))
+            ])
+        created += len(recipes)
+    return created
+
+
+def create_relations(rng, model, field, users, targets, max_count,
+                     batch_size):
+    rows = (
+        model(user_id=user, **{f'{field}_id': target})
+        for user in users
+        for target in targets.sample(rng.randint(0, max_count))
+        if model is not Follow or target != user
+    )
+    total = 0
+    for batch in batches(rows, batch_size):
+        model.objects.bulk_create(batch, ignore_conflicts=True)
+        total += len(batch)
+    return total
+
+
+def generate(users, recipes, seed, batch_size):
+    rng = random.Random(seed)
+    ensure_catalogue(batch_size)
+    user_pks = create_users(users, batch_size)
+    authors = Skewed(rng, user_pks)
+    totals = {
+        'users': len(user_pks),
+        'recipes': create_generated_recipes(
+            rng, recipes, authors, batch_size
+        ),
+    }
+    recipe_pks = list(Recipe.objects.filter(
+        author__in=user_pks
+    ).order_by('pk').values_list('pk', flat=True))
+    rng.shuffle(recipe_pks)
+    recipe_pks = Skewed(rng, recipe_pks)
+    totals['follows'] = create_relations(
+        rng, Follow, 'author', user_pks, Skewed(rng, user_pks), 20,
+        batch_size
+    )
+    totals['favorites'] = create_relations(
+        rng, Favorite, 'recipe', user_pks, recipe_pks, 30, batch_size
+    )
+    totals['shopping_carts'] = create_relations(
+        rng, ShoppingCart, 'recipes', user_pks, recipe_pks, 8, batch_size
+    )
+    return totals
@@ -0,0 +1,49 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from sorl.thumbnail import get_thumbnail
+
+from recipe.models import Recipe
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.IMAGE_WORKERS,
+    thread_name_prefix='recipe-images'
+)
+
+
+def generate_thumbnails(recipe_pk):
+    try:
+        recipe = Recipe.objects.filter(pk=recipe_pk).first()
+        if recipe is None or not recipe.image:
+            return
+        thumbnails = {
+            name: get_thumbnail(
+                recipe.image,
+                geometry,
+                format='WEBP',
+                quality=settings.RECIPE_IMAGE_QUALITY,
+                **options
+            ).url
+            for name, (geometry, options)
+            in settings.RECIPE_IMAGE_SIZES.items()
+        }
+        Recipe.objects.filter(pk=recipe_pk, image=recipe.image.name).update(
+            thumbnails=thumbnails,
+            updated_at=timezone.now()
+        )
+    except Exception:
+        logger.exception('Не удалось обработать изображение рецепта %s',
+                         recipe_pk)
+    finally:
+        connection.close()
+
+
+def schedule_thumbnails(recipe):
+    transaction.on_commit(
+        lambda: executor.submit(generate_thumbnails, recipe.pk)
+    )
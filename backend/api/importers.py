@@ -0,0 +1,190 @@
+import csv
+import io
+import json
+from collections import Counter
+from itertools import islice
+from pathlib import Path
+
+from django.db import connection, transaction
+
+from api.cache import bump_version
+from api.counters import change_counters
+from api.search import ingredient_index
+from recipe.models import Ingredient, Recipe, RecipeIngredient, RecipeTag, Tag
+from users.models import User
+
+
+def read_rows(path):
+    suffix = Path(path).suffix
+    if suffix not in ('.csv', '.json', '.jsonl'):
+        raise ValueError(f'Неподдерживаемый формат файла: {path}')
+    with open(path, encoding='utf-8') as file:
+        if suffix == '.csv':
+            yield from csv.DictReader(file)
+        elif suffix == '.jsonl':
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(file)
+
+
+def batches(rows, batch_size):
+    rows = iter(rows)
+    batch = list(islice(rows, batch_size))
+    while batch:
+        yield batch
+        batch = list(islice(rows, batch_size))
+
+
+def copy_ingredients(rows, batch_size):
+    quote = connection.ops.quote_name
+    fields = [
+        Ingredient._meta.get_field(name)
+        for name in ('name', 'measurement_unit')
+    ]
+    columns = ', '.join(quote(field.column) for field in fields)
+    staging_columns = ', '.join(
+        f'{quote(field.column)} {field.db_type(connection)}'
+        for field in fields
+    )
+    total = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMP TABLE ingredient_staging ({staging_columns}) '
+            'ON COMMIT DROP'
+        )
+        for batch in batches(rows, batch_size):
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(
+                (row['name'], row.get('measurement_unit', ''))
+                for row in batch
+            )
+            buffer.seek(0)
+            cursor.copy_expert(
+                'COPY ingredient_staging FROM STDIN WITH (FORMAT csv)',
+                buffer
+            )
+            total += len(batch)
+        cursor.execute(
+            f'INSERT INTO {quote(Ingredient._meta.db_table)} ({columns}) '
+            f'SELECT DISTINCT {columns} FROM ingredient_staging '
+            f'ON CONFLICT ({columns}) DO NOTHING'
+        )
+    return total
+
+
+def import_ingredients(rows, batch_size):
+    if connection.vendor == 'postgresql':
+        total = copy_ingredients(rows, batch_size)
+    else:
+        total = 0
+        for batch in batches(rows, batch_size):
+            Ingredient.objects.bulk_create(
+                [Ingredient(
+                    name=row['name'],
+                    measurement_unit=row.get('measurement_unit', '')
+                ) for row in batch],
+                ignore_conflicts=True
+            )
+            total += len(batch)
+    ingredient_index.clear()
+    bump_version('ingredients')
+    return total
+
+
+def import_tags(rows, batch_size):
+    total = 0
+    for batch in batches(rows, batch_size):
+        Tag.objects.bulk_create(
+            [Tag(
+                name=row['name'],
+                color=row['color'],
+                slug=row['slug']
+            ) for row in batch],
+            ignore_conflicts=True
+        )
+        total += len(batch)
+    bump_version('tags')
+    return total
+
+
+def create_recipes(recipes):
+    if connection.features.can_return_rows_from_bulk_insert:
+        return Recipe.objects.bulk_create(recipes)
+    for recipe in recipes:
+        recipe.save()
+    return recipes
+
+
+def import_recipe_batch(batch, tags):
+    authors = User.objects.in_bulk(
+        {row['author'] for row in batch}, field_name='email'
+    )
+    ingredients = {
+        (ingredient.name, ingredient.measurement_unit): ingredient.pk
+        for ingredient in Ingredient.objects.filter(
+            name__in={
+                item['name'] for row in batch for item in row['ingredients']
+            }
+        )
+    }
+    existing = set(Recipe.objects.filter(
+        author__in=authors.values(),
+        name__in={row['name'] for row in batch}
+    ).values_list('author_id', 'name'))
+
+    rows = []
+    for row in batch:
+        author = authors.get(row['author'])
+        if author is None or (author.pk, row['name']) in existing:
+            continue
+        existing.add((author.pk, row['name']))
+        rows.append((row, Recipe(
+            author=author,
+            name=row['name'],
+            text=row.get('text', ''),
+            cooking_time=row['cooking_time'],
+            image=row.get('image', '')
+        )))
+
+    recipes = create_recipes([recipe for row, recipe in rows])
+    created = Counter(recipe.author_id for recipe in recipes)
+    for count in set(created.values()):
+        change_counters(User, [
+            pk for pk, total in created.items() if total == count
+        ], 'recipes_count', count)
+    RecipeTag.objects.bulk_create([
+        RecipeTag(recipe=recipe, tag_id=tags[slug])
+        for (row, _), recipe in zip(rows, recipes)
+        for slug in row.get('tags', ()) if slug in tags
+    ])
+    RecipeIngredient.objects.bulk_create([
+        RecipeIngredient(
+            recipe=recipe,
+            ingredient_id=ingredients[
+                (item['name'], item['measurement_unit'])
+            ],
+            amount=item['amount']
+        )
+        for (row, _), recipe in zip(rows, recipes)
+        for item in row['ingredients']
+        if (item['name'], item['measurement_unit']) in ingredients
+    ])
+
+
+def import_recipes(rows, batch_size):
+    tags = dict(Tag.objects.values_list('slug', 'pk'))
+    total = 0
+    for batch in batches(rows, batch_size):
+        with transaction.atomic():
+            import_recipe_batch(batch, tags)
+        total += len(batch)
+    return total
+
+
+IMPORTERS = {
+    'ingredients': import_ingredients,
+    'tags': import_tags,
+    'recipes': import_recipes,
+}
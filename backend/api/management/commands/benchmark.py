@@ -0,0 +1,120 @@
+import json
+import platform
+import subprocess
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from api.benchmark import SCENARIOS, Bench, run_scenario
+from recipe.models import Favorite, Recipe, ShoppingCart
+from users.models import Follow, User
+
+METRICS = ('p50_ms', 'p95_ms', 'queries_per_request', 'peak_rss_delta_mb')
+
+
+def get_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+            check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Run API scenario benchmarks against generated data'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            choices=SCENARIOS,
+            help='Scenario to run, can be repeated (default: all)'
+        )
+        parser.add_argument('--iterations', type=int, default=100)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--cold',
+            action='store_true',
+            help='Clear caches before every measured request'
+        )
+        parser.add_argument('--output', help='Path of the JSON report')
+        parser.add_argument(
+            '--compare', help='Previous JSON report to compare against'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            bench = Bench(options['seed'])
+        except LookupError as error:
+            raise CommandError(error)
+        commit = get_commit()
+        report = {
+            'commit': commit,
+            'created': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'options': {
+                name: options[name]
+                for name in ('iterations', 'warmup', 'seed', 'cold')
+            },
+            'dataset': {
+                'users': User.objects.count(),
+                'recipes': Recipe.objects.count(),
+                'follows': Follow.objects.count(),
+                'favorites': Favorite.objects.count(),
+                'shopping_carts': ShoppingCart.objects.count(),
+            },
+            'scenarios': {},
+        }
+        for name in options['scenario'] or SCENARIOS:
+            result = run_scenario(
+                bench, name, options['iterations'],
+                options['warmup'], options['cold']
+            )
+            report['scenarios'][name] = result
+            self.stdout.write(
+                '{:<24} p50 {:>8.2f} ms  p95 {:>8.2f} ms  '
+                '{:>6.1f} queries  {:>3} errors'.format(
+                    name, result['p50_ms'], result['p95_ms'],
+                    result['queries_per_request'], result['errors']
+                )
+            )
+
+        output = Path(options['output'] or Path(settings.BASE_DIR).joinpath(
+            'benchmarks',
+            '{}.json'.format(commit or timezone.now().strftime('%Y%m%d%H%M'))
+        ))
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+        self.stdout.write(self.style.SUCCESS(f'Report saved to {output}.'))
+
+        if options['compare']:
+            self.compare(report, options['compare'])
+
+    def compare(self, report, path):
+        try:
+            previous = json.loads(Path(path).read_text())
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+        self.stdout.write('Compared with {} ({}):'.format(
+            path, previous.get('commit')
+        ))
+        for name, result in report['scenarios'].items():
+            before = previous['scenarios'].get(name)
+            if before is None:
+                continue
+            changes = []
+            for metric in METRICS:
+                if metric not in before:
+                    continue
+                old, new = before[metric], result[metric]
+                change = (new - old) / old * 100 if old else 0
+                changes.append(f'{metric} {old} -> {new} ({change:+.1f}%)')
+            self.stdout.write('  {:<24} {}'.format(name, ', '.join(changes)))
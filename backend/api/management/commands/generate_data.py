@@ -0,0 +1,48 @@
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from api.cache import bump_version
+from api.generator import clear_generated, generate
+from api.shopping_cart import rebuild_shopping_lists
+
+
+class Command(BaseCommand):
+    help = 'Generate a reproducible synthetic dataset for benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.IMPORT_BATCH_SIZE,
+            help='Rows per batch'
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Delete previously generated users and their data first'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        if options['clear']:
+            clear_generated()
+        totals = generate(
+            options['users'], options['recipes'],
+            options['seed'], options['batch_size']
+        )
+        call_command('rebuild_counters', stdout=self.stdout)
+        call_command('update_trending', stdout=self.stdout)
+        rebuild_shopping_lists()
+        bump_version('users')
+        summary = ', '.join(
+            f'{name}: {total}' for name, total in totals.items()
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'{summary} in {time.monotonic() - started:.1f}s.'
+        ))
@@ -0,0 +1,38 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.importers import IMPORTERS, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Import ingredients, tags or recipes from CSV, JSON or JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=IMPORTERS)
+        parser.add_argument('path', type=str, help='Path to the data file')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.IMPORT_BATCH_SIZE,
+            help='Rows per batch'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            total = IMPORTERS[options['model']](
+                read_rows(options['path']), options['batch_size']
+            )
+        except (OSError, ValueError, KeyError) as error:
+            raise CommandError(error)
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                '{}: {} rows processed in {:.2f}s ({:.0f} rows/s).'.format(
+                    options['model'], total, elapsed,
+                    total / elapsed if elapsed else total
+                )
+            )
+        )
@@ -0,0 +1,52 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from statistics import quantiles
+from urllib.error import URLError
+from urllib.request import Request, urlopen
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Send concurrent GET requests to a running server'
+
+    def add_arguments(self, parser):
+        parser.add_argument('url')
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--token', help='Auth token to send')
+
+    def fetch(self, url, headers):
+        start = time.perf_counter()
+        try:
+            with urlopen(Request(url, headers=headers)) as response:
+                response.read()
+                ok = response.status < 400
+        except (URLError, OSError):
+            ok = False
+        return time.perf_counter() - start, ok
+
+    def handle(self, *args, **options):
+        headers = {}
+        if options['token']:
+            headers['Authorization'] = f'Token {options["token"]}'
+        start = time.perf_counter()
+        with ThreadPoolExecutor(options['concurrency']) as pool:
+            results = list(pool.map(
+                lambda _: self.fetch(options['url'], headers),
+                range(options['requests'])
+            ))
+        elapsed = time.perf_counter() - start
+        latencies = sorted(latency for latency, _ in results)
+        percentiles = quantiles(latencies, n=100)
+        self.stdout.write(
+            'requests: {}, errors: {}, concurrency: {}\n'
+            'rps: {:.1f}, p50: {:.1f} ms, p95: {:.1f} ms'.format(
+                len(results),
+                sum(not ok for _, ok in results),
+                options['concurrency'],
+                len(results) / elapsed,
+                percentiles[49] * 1000,
+                percentiles[94] * 1000
+            )
+        )
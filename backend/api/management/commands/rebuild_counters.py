@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from api.cache import bump_version
+from api.counters import COUNTERS, count_related
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or verify denormalised favorite, cart and follow counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Only report counters that are out of date'
+        )
+
+    def handle(self, *args, **options):
+        for model, field, related_model, related_field in COUNTERS:
+            actual = count_related(related_model, related_field)
+            with transaction.atomic():
+                stale = model.objects.annotate(
+                    actual=actual
+                ).exclude(**{field: F('actual')})
+                if options['verify']:
+                    changed = stale.count()
+                else:
+                    changed = model.objects.filter(
+                        pk__in=stale.values('pk')
+                    ).update(**{field: actual})
+                    if changed:
+                        bump_version(f'{model._meta.model_name}-{field}')
+            self.stdout.write(
+                '{}.{}: {} stale rows{}.'.format(
+                    model.__name__, field, changed,
+                    '' if options['verify'] else ' fixed'
+                )
+            )
+        self.stdout.write(self.style.SUCCESS('Counters checked.'))
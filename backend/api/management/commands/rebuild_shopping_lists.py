@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.shopping_cart import rebuild_shopping_lists
+
+
+class Command(BaseCommand):
+    help = 'Rebuild aggregated shopping lists from shopping carts'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = rebuild_shopping_lists()
+        self.stdout.write(
+            self.style.SUCCESS(f'Shopping lists rebuilt: {total} rows.')
+        )
@@ -0,0 +1,106 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from api.cache import bump_version
+from recipe.models import Favorite, Recipe, ShoppingCart
+
+UPDATED_AT_KEY = 'trending:updated_at'
+MIN_SCORE = 1e-6
+
+
+class Command(BaseCommand):
+    help = 'Recompute time-decayed trending scores for recipes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Recompute the whole window instead of applying the events '
+                 'since the last run'
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        window = timedelta(days=settings.TRENDING_WINDOW_DAYS)
+        updated_at = cache.get(UPDATED_AT_KEY)
+        with transaction.atomic():
+            if (options['full'] or updated_at is None
+                    or now - updated_at >= window):
+                mode = 'recomputed'
+                count = self.recompute(now, window)
+            else:
+                mode = 'updated'
+                count = self.update(now, window, updated_at)
+        cache.set(UPDATED_AT_KEY, now, None)
+        bump_version('recipe-trending_score')
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Trending scores {mode} for {count} recipes.'
+            )
+        )
+
+    def get_scores(self, now, start, end, sign=1):
+        half_life = timedelta(
+            hours=settings.TRENDING_HALF_LIFE_HOURS
+        ).total_seconds()
+        events = (
+            (Favorite, 'recipe', settings.TRENDING_FAVORITE_WEIGHT),
+            (ShoppingCart, 'recipes', settings.TRENDING_SHOPPING_CART_WEIGHT),
+        )
+        scores = defaultdict(float)
+        for model, recipe_field, weight in events:
+            rows = model.objects.filter(
+                created__gt=start, created__lte=end
+            ).values_list(
+                recipe_field, 'created'
+            ).iterator(chunk_size=settings.TRENDING_BATCH_SIZE)
+            for recipe_id, created in rows:
+                age = (now - created).total_seconds()
+                scores[recipe_id] += sign * weight * 0.5 ** (age / half_life)
+        return scores
+
+    def recompute(self, now, window):
+        scores = self.get_scores(now, now - window, now)
+        Recipe.objects.filter(trending_score__gt=0).update(trending_score=0)
+        Recipe.objects.bulk_update(
+            [Recipe(pk=pk, trending_score=score)
+             for pk, score in scores.items()],
+            ['trending_score'],
+            batch_size=settings.TRENDING_BATCH_SIZE
+        )
+        return len(scores)
+
+    def update(self, now, window, updated_at):
+        # Decay what was stored at the last run, then add the events created
+        # since and take away the events that have left the window since.
+        # Removed favorites and cart items stay counted until --full.
+        half_life = timedelta(
+            hours=settings.TRENDING_HALF_LIFE_HOURS
+        ).total_seconds()
+        Recipe.objects.filter(trending_score__gt=0).update(
+            trending_score=F('trending_score') * 0.5 ** (
+                (now - updated_at).total_seconds() / half_life
+            )
+        )
+        scores = self.get_scores(now, updated_at, now)
+        for pk, score in self.get_scores(
+            now, updated_at - window, now - window, sign=-1
+        ).items():
+            scores[pk] += score
+        Recipe.objects.bulk_update(
+            [Recipe(pk=pk, trending_score=F('trending_score') + score)
+             for pk, score in scores.items()],
+            ['trending_score'],
+            batch_size=settings.TRENDING_BATCH_SIZE
+        )
+        Recipe.objects.filter(trending_score__lt=MIN_SCORE).exclude(
+            trending_score=0
+        ).update(trending_score=0)
+        return len(scores)
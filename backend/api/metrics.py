@@ -0,0 +1,425 @@
+import asyncio
+import cProfile
+import ipaddress
+import json
+import logging
+import os
+import random
+import threading
+import time
+import traceback
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+SUMMARIES = (
+    ('request_seconds', 'Request wall time'),
+    ('sql_queries', 'SQL queries per request'),
+    ('sql_seconds', 'SQL time per request'),
+    ('serialize_seconds', 'Serializer time'),
+    ('render_seconds', 'Response rendering time'),
+    ('response_bytes', 'Response body size'),
+)
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.pid = None
+        self.path = None
+        self.flushed = 0
+        self.clear()
+
+    def clear(self):
+        self.events = Counter()
+        self.requests = Counter()
+        self.sums = defaultdict(Counter)
+        self.buckets = defaultdict(Counter)
+
+    def observe(self, view, method, status, values):
+        with self.lock:
+            self.requests[(view, method, status)] += 1
+            for name, value in values.items():
+                self.sums[name][(view, method)] += value
+            for bucket in DURATION_BUCKETS:
+                if values['request_seconds'] <= bucket:
+                    self.buckets[(view, method)][bucket] += 1
+        self.flush()
+
+    def count(self, name, result):
+        with self.lock:
+            self.events[(name, result)] += 1
+        self.flush()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'events': list(self.events.items()),
+                'requests': list(self.requests.items()),
+                'sums': [
+                    (name, list(values.items()))
+                    for name, values in self.sums.items()
+                ],
+                'buckets': [
+                    (key, list(values.items()))
+                    for key, values in self.buckets.items()
+                ],
+            }
+
+    def merge(self, snapshot):
+        with self.lock:
+            for key, total in snapshot['events']:
+                self.events[tuple(key)] += total
+            for key, total in snapshot['requests']:
+                self.requests[tuple(key)] += total
+            for name, values in snapshot['sums']:
+                for key, total in values:
+                    self.sums[name][tuple(key)] += total
+            for key, values in snapshot['buckets']:
+                for bucket, total in values:
+                    self.buckets[tuple(key)][bucket] += total
+
+    def flush(self, force=False):
+        # Each worker keeps its own file, so /metrics/ can add up all
+        # workers whichever of them answers the scrape.
+        if settings.SERVER_WORKERS < 2:
+            return
+        now = time.monotonic()
+        if not force and now - self.flushed < settings.METRICS_FLUSH_SECONDS:
+            return
+        self.flushed = now
+        with self.flush_lock:
+            directory = Path(settings.METRICS_DIR)
+            if self.pid != os.getpid() or self.path.parent != directory:
+                self.pid = os.getpid()
+                self.path = directory / '{}-{}.json'.format(
+                    self.pid, time.time_ns()
+                )
+            directory.mkdir(parents=True, exist_ok=True)
+            temporary = self.path.with_suffix('.tmp')
+            temporary.write_text(json.dumps(self.snapshot()))
+            os.replace(temporary, self.path)
+
+    def collect(self):
+        if settings.SERVER_WORKERS < 2:
+            return self
+        self.flush(force=True)
+        total = Registry()
+        for path in Path(settings.METRICS_DIR).glob('*.json'):
+            try:
+                total.merge(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                logger.warning('Cannot read metrics file %s', path)
+        return total
+
+    def render(self):
+        lines = [
+            '# HELP foodgram_requests_total Requests handled',
+            '# TYPE foodgram_requests_total counter',
+        ]
+        with self.lock:
+            for (view, method, status), total in sorted(
+                self.requests.items()
+            ):
+                lines.append(
+                    'foodgram_requests_total{{view="{}",method="{}",'
+                    'status="{}"}} {}'.format(view, method, status, total)
+                )
+            counts = Counter()
+            for (view, method, status), total in self.requests.items():
+                counts[(view, method)] += total
+
+            lines += [
+                '# HELP foodgram_request_duration_seconds Request wall time',
+                '# TYPE foodgram_request_duration_seconds histogram',
+            ]
+            for (view, method), total in sorted(counts.items()):
+                labels = f'view="{view}",method="{method}"'
+                for bucket in DURATION_BUCKETS:
+                    lines.append(
+                        'foodgram_request_duration_seconds_bucket'
+                        '{{{},le="{}"}} {}'.format(
+                            labels, bucket,
+                            self.buckets[(view, method)][bucket]
+                        )
+                    )
+                lines.append(
+                    'foodgram_request_duration_seconds_bucket'
+                    f'{{{labels},le="+Inf"}} {total}'
+                )
+
+            for name, description in SUMMARIES:
+                lines += [
+                    f'# HELP foodgram_{name} {description}',
+                    f'# TYPE foodgram_{name} summary',
+                ]
+                for (view, method), total in sorted(counts.items()):
+                    labels = f'view="{view}",method="{method}"'
+                    lines.append('foodgram_{}_sum{{{}}} {}'.format(
+                        name, labels, self.sums[name][(view, method)]
+                    ))
+                    lines.append(
+                        f'foodgram_{name}_count{{{labels}}} {total}'
+                    )
+
+            names = sorted({name for name, result in self.events})
+            for name in names:
+                lines += [
+                    f'# HELP foodgram_{name}_total Events by result',
+                    f'# TYPE foodgram_{name}_total counter',
+                ]
+                for (event, result), total in sorted(self.events.items()):
+                    if event == name:
+                        lines.append(
+                            f'foodgram_{name}_total{{result="{result}"}} '
+                            f'{total}'
+                        )
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+current_metrics = ContextVar('current_metrics', default=None)
+
+
+def get_origin():
+    base_dir = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()):
+        if (frame.filename.startswith(base_dir)
+                and 'site-packages' not in frame.filename
+                and frame.filename != __file__):
+            return f'{frame.filename}:{frame.lineno} in {frame.name}'
+    return 'unknown'
+
+
+class RequestMetrics:
+    def __init__(self, request):
+        self.request = request
+        self.queries = 0
+        self.sql_seconds = 0
+        self.serialize_seconds = 0
+        self.render_seconds = 0
+        self.request_seconds = 0
+        self.size = 0
+        self.statements = Counter()
+        self.timers = set()
+        self.profile = None
+        if (settings.PROFILE_SAMPLE_RATE
+                and random.random() < settings.PROFILE_SAMPLE_RATE):
+            self.profile = cProfile.Profile()
+
+    def execute(self, execute, sql, params, many, context):
+        self.statements[sql] += 1
+        if self.statements[sql] == settings.DUPLICATE_QUERY_THRESHOLD:
+            logger.warning(
+                'Duplicate SQL on %s %s (%s times so far) from %s: %s',
+                self.request.method, self.request.path,
+                self.statements[sql], get_origin(), sql
+            )
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_seconds += time.perf_counter() - start
+
+    @contextmanager
+    def track(self, profile=True):
+        token = current_metrics.set(self)
+        start = time.perf_counter()
+        try:
+            with self.profiling() if profile else nullcontext():
+                yield
+        finally:
+            self.request_seconds += time.perf_counter() - start
+            current_metrics.reset(token)
+
+    @contextmanager
+    def profiling(self):
+        if self.profile is None:
+            yield
+            return
+        self.profile.enable()
+        try:
+            yield
+        finally:
+            self.profile.disable()
+
+    @contextmanager
+    def timing(self, name):
+        if name in self.timers:
+            yield
+            return
+        self.timers.add(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            setattr(
+                self, name,
+                getattr(self, name) + time.perf_counter() - start
+            )
+            self.timers.discard(name)
+
+    def start_render(self, response):
+        start = time.perf_counter()
+
+        def finish_render(response):
+            self.render_seconds += time.perf_counter() - start
+
+        response.add_post_render_callback(finish_render)
+
+    def stream(self, content, response):
+        with self.track():
+            for chunk in content:
+                self.size += len(chunk)
+                yield chunk
+        self.finish(response)
+
+    def finish(self, response):
+        match = self.request.resolver_match
+        view = match.url_name if match and match.url_name else 'unknown'
+        registry.observe(view, self.request.method, response.status_code, {
+            'request_seconds': self.request_seconds,
+            'sql_queries': self.queries,
+            'sql_seconds': self.sql_seconds,
+            'serialize_seconds': self.serialize_seconds,
+            'render_seconds': self.render_seconds,
+            'response_bytes': self.size,
+        })
+        if (self.profile
+                and self.request_seconds * 1000 >= settings.PROFILE_SLOW_MS):
+            self.dump_profile(view)
+
+    def dump_profile(self, view):
+        directory = Path(settings.PROFILE_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / '{}-{}-{}ms.prof'.format(
+            view, int(time.time() * 1000), int(self.request_seconds * 1000)
+        )
+        self.profile.dump_stats(path)
+        logger.info('Slow request profile saved to %s', path)
+
+
+@contextmanager
+def timed(name):
+    metrics = current_metrics.get()
+    if metrics is None:
+        yield
+        return
+    with metrics.timing(name):
+        yield
+
+
+@contextmanager
+def profiling():
+    metrics = current_metrics.get()
+    if metrics is None:
+        yield
+        return
+    with metrics.profiling():
+        yield
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics.execute(execute, sql, params, many, context)
+
+
+def install_execute_wrapper(connection):
+    if execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_wrapper)
+
+
+def serialize(serializer):
+    with timed('serialize_seconds'):
+        return serializer.data
+
+
+class SerializationTimingMixin:
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                serialize(self.get_serializer(page, many=True))
+            )
+        return Response(serialize(self.get_serializer(queryset, many=True)))
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(serialize(self.get_serializer(self.get_object())))
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = request.metrics = RequestMetrics(request)
+        with metrics.track():
+            response = self.get_response(request)
+        return self.observe(metrics, response)
+
+    async def __acall__(self, request):
+        metrics = request.metrics = RequestMetrics(request)
+        with metrics.track(profile=False):
+            response = await self.get_response(request)
+        return self.observe(metrics, response)
+
+    def observe(self, metrics, response):
+        if response.streaming:
+            response.streaming_content = metrics.stream(
+                response.streaming_content, response
+            )
+        else:
+            metrics.size = len(response.content)
+            metrics.finish(response)
+        return response
+
+    def process_template_response(self, request, response):
+        request.metrics.start_render(response)
+        return response
+
+
+def in_networks(address, networks):
+    try:
+        address = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network, strict=False)
+        for network in networks
+    )
+
+
+def get_client_ip(request):
+    address = request.META.get('REMOTE_ADDR', '')
+    if in_networks(address, settings.METRICS_TRUSTED_PROXIES):
+        return request.META.get('HTTP_X_REAL_IP', address)
+    return address
+
+
+def metrics_view(request):
+    if not in_networks(get_client_ip(request), settings.METRICS_ALLOWED_IPS):
+        raise Http404
+    return HttpResponse(
+        registry.collect().render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
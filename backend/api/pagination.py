@@ -1,6 +1,234 @@
-from rest_framework.pagination import PageNumberPagination
+import hashlib
+import json
 
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
-class RecipePagination(PageNumberPagination):
+
+class CountStrategyPaginator(Paginator):
+    count_strategy = None
+
+    def can_estimate(self, queryset):
+        return connections[queryset.db].vendor == 'postgresql'
+
+    def estimate_count(self, queryset):
+        plan = json.loads(queryset.order_by().explain(format='json'))
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list.order_by()
+        threshold = settings.COUNT_EXACT_THRESHOLD
+        bounded = queryset[:threshold + 1].count()
+        if bounded <= threshold:
+            self.count_strategy = 'exact'
+            return bounded
+
+        key = 'count:{}'.format(
+            hashlib.md5(str(queryset.query).encode()).hexdigest()
+        )
+        count = cache.get(key)
+        if count is not None:
+            self.count_strategy = 'cached'
+            return count
+
+        if self.can_estimate(queryset):
+            self.count_strategy = 'estimate'
+            count = max(self.estimate_count(queryset), threshold + 1)
+        else:
+            self.count_strategy = 'exact'
+            count = queryset.count()
+        cache.set(key, count, settings.COUNT_CACHE_TIMEOUT)
+        return count
+
+    def page_exists(self, number):
+        bottom = (number - 1) * self.per_page
+        return self.object_list[bottom:bottom + 1].exists()
+
+    def validate_number(self, number):
+        try:
+            number = super().validate_number(number)
+        except EmptyPage:
+            if self.count_strategy == 'exact' or int(number) < 1:
+                raise
+            number = int(number)
+        if (self.count_strategy != 'exact' and number > 1
+                and not self.page_exists(number)):
+            raise EmptyPage(_('That page contains no results'))
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if self.count_strategy == 'exact':
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(
+            self.object_list[bottom:bottom + self.per_page], number, self
+        )
+
+
+class CountStrategyPagination(PageNumberPagination):
+    django_paginator_class = CountStrategyPaginator
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response['X-Count-Strategy'] = self.page.paginator.count_strategy
+        return response
+
+
+class RecipePagination(CountStrategyPagination):
     page_size = 6
     page_size_query_param = 'limit'
+
+
+class SubscriptionPagination(CountStrategyPagination):
+    page_size = 10
+    page_size_query_param = 'limit'
+
+
+class CursorSerializer(signing.JSONSerializer):
+    def dumps(self, obj):
+        return json.dumps(
+            obj, separators=(',', ':'), default=str
+        ).encode('latin-1')
+
+
+class KeysetPagination(BasePagination):
+    page_size = 6
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    cursor_salt = 'api.pagination.KeysetPagination'
+    invalid_cursor_message = 'Некорректный курсор.'
+
+    def get_ordering(self, queryset):
+        ordering = list(
+            queryset.query.order_by or queryset.model._meta.ordering
+        )
+        if not {'id', '-id', 'pk', '-pk'} & set(ordering):
+            ordering.append('id')
+        return ordering
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            cursor = signing.loads(
+                encoded, salt=self.cursor_salt, serializer=CursorSerializer
+            )
+            if cursor['o'] != self.ordering:
+                raise ValueError
+            return cursor['p'], bool(cursor['r'])
+        except (signing.BadSignature, ValueError, KeyError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance, reverse):
+        position = [
+            getattr(instance, field.lstrip('-')) for field in self.ordering
+        ]
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            signing.dumps(
+                {'o': self.ordering, 'p': position, 'r': reverse},
+                salt=self.cursor_salt,
+                serializer=CursorSerializer
+            )
+        )
+
+    def get_position_filter(self, position, reverse):
+        if len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, position):
+            descending = field.startswith('-') != reverse
+            name = field.lstrip('-')
+            lookup = 'lt' if descending else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        position, reverse = self.decode_cursor(request)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [
+                field[1:] if field.startswith('-') else f'-{field}'
+                for field in ordering
+            ]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(
+                self.get_position_filter(position, reverse)
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.next = self.previous = None
+        if results and (has_more or reverse):
+            self.next = self.encode_cursor(results[-1], False)
+        if results and (has_more if reverse else position is not None):
+            self.previous = self.encode_cursor(results[0], True)
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.next,
+            'previous': self.previous,
+            'results': data,
+        })
+
+
+class FeedPagination(BasePagination):
+    page_number_class = RecipePagination
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_number = self.page_number_class()
+        if page_number.page_query_param in request.query_params:
+            self.paginator = page_number
+        else:
+            self.paginator = self.keyset_class()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+
+class SubscriptionKeysetPagination(KeysetPagination):
+    page_size = 10
+
+
+class SubscriptionFeedPagination(FeedPagination):
+    page_number_class = SubscriptionPagination
+    keyset_class = SubscriptionKeysetPagination
@@ -0,0 +1,83 @@
+from django.db import connection
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import NotFound
+
+from api.cache import bump_version
+
+
+def get_columns(model, field):
+    quote = connection.ops.quote_name
+    return (
+        quote(model._meta.db_table),
+        quote(model._meta.get_field('user').column),
+        quote(model._meta.get_field(field).column),
+    )
+
+
+def add_relations(model, field, user, pks):
+    if not pks:
+        return set()
+    table, user_column, column = get_columns(model, field)
+    target = model._meta.get_field(field).related_model
+    quote = connection.ops.quote_name
+    columns = [user_column, column]
+    values = ['%s', quote(target._meta.pk.column)]
+    params = [user.pk]
+    if any(item.name == 'created' for item in model._meta.fields):
+        columns.append(quote('created'))
+        values.append('%s')
+        params.append(timezone.now())
+    placeholders = ', '.join(['%s'] * len(pks))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} ({", ".join(columns)}) '
+            f'SELECT {", ".join(values)} '
+            f'FROM {quote(target._meta.db_table)} '
+            f'WHERE {quote(target._meta.pk.column)} IN ({placeholders}) '
+            f'ON CONFLICT DO NOTHING RETURNING {column}',
+            [*params, *pks]
+        )
+        added = {row[0] for row in cursor.fetchall()}
+    if added:
+        bump_version(f'user-{user.pk}')
+    return added
+
+
+def remove_relations(model, field, user, pks):
+    if not pks:
+        return set()
+    table, user_column, column = get_columns(model, field)
+    placeholders = ', '.join(['%s'] * len(pks))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {table} '
+            f'WHERE {user_column} = %s AND {column} IN ({placeholders}) '
+            f'RETURNING {column}',
+            [user.pk, *pks]
+        )
+        removed = {row[0] for row in cursor.fetchall()}
+    if removed:
+        bump_version(f'user-{user.pk}')
+    return removed
+
+
+def add_relation(model, field, user, pk):
+    return bool(add_relations(model, field, user, [pk]))
+
+
+def remove_relation(model, field, user, pk):
+    return bool(remove_relations(model, field, user, [pk]))
+
+
+def batch_results(pks, changed, found, success, failure):
+    results = []
+    for pk in pks:
+        if pk in changed:
+            code, message = success
+        elif pk in found:
+            code, message = status.HTTP_400_BAD_REQUEST, failure
+        else:
+            code, message = status.HTTP_404_NOT_FOUND, NotFound.default_detail
+        results.append({'id': pk, 'status': code, 'message': str(message)})
+    return results
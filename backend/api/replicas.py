@@ -0,0 +1,104 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.permissions import SAFE_METHODS
+
+from api.cache import get_version
+
+STICKY_COOKIE = 'db_sticky'
+SHARED_VERSIONS = ('tags', 'ingredients', 'users')
+
+read_database = ContextVar('read_database', default=None)
+
+
+@contextmanager
+def use_primary():
+    token = read_database.set(None)
+    try:
+        yield
+    finally:
+        read_database.reset(token)
+
+
+def get_sticky_key(user):
+    return f'db-sticky:{user.pk}'
+
+
+def is_sticky(request):
+    # The cookie covers browsers, the cache entry covers token clients that
+    # do not keep cookies between requests.
+    if STICKY_COOKIE in request.COOKIES:
+        return True
+    user = request.user
+    return user.is_authenticated and bool(cache.get(get_sticky_key(user)))
+
+
+def has_fresh_versions(user):
+    names = list(SHARED_VERSIONS)
+    if user.is_authenticated:
+        names.append(f'user-{user.pk}')
+    fresh = time.time() - settings.DATABASE_REPLICA_STICKY_SECONDS
+    return any(get_version(name) > fresh for name in names)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return read_database.get()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == 'default'
+
+
+class ReplicaReadMixin:
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (settings.DATABASE_REPLICAS
+                and request.method in SAFE_METHODS
+                and not is_sticky(request)
+                and not has_fresh_versions(request.user)):
+            self.read_database_token = read_database.set(
+                random.choice(settings.DATABASE_REPLICAS)
+            )
+
+    def get_catalogue(self):
+        # The catalogue is cached under a version bumped on the primary, so
+        # it must not be built from a replica that has not caught up yet.
+        with use_primary():
+            return super().get_catalogue()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, 'read_database_token', None)
+        if token is not None:
+            read_database.reset(token)
+            self.read_database_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class StickyWritesMiddleware(MiddlewareMixin):
+    def process_response(self, request, response):
+        user = getattr(request, 'user', None)
+        if (settings.DATABASE_REPLICAS
+                and request.method not in SAFE_METHODS
+                and user is not None and user.is_authenticated
+                and response.status_code < 400):
+            cache.set(
+                get_sticky_key(user), True,
+                settings.DATABASE_REPLICA_STICKY_SECONDS
+            )
+            response.set_cookie(
+                STICKY_COOKIE, '1',
+                max_age=settings.DATABASE_REPLICA_STICKY_SECONDS,
+                httponly=True, samesite='Lax'
+            )
+        return response
@@ -0,0 +1,66 @@
+from bisect import bisect_left
+from threading import Lock
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, Value, When
+
+from recipe.models import Ingredient
+
+
+class IngredientIndex:
+    def __init__(self):
+        self._names = None
+        self._lock = Lock()
+
+    def clear(self):
+        self._names = None
+
+    def load(self):
+        with self._lock:
+            if self._names is None:
+                self._names = sorted(
+                    (name.lower(), pk)
+                    for pk, name in Ingredient.objects.values_list(
+                        'pk', 'name'
+                    )
+                )
+            return self._names
+
+    def search(self, value, limit):
+        names = self.load()
+        value = value.lower()
+        found = []
+        position = bisect_left(names, (value,))
+        while (position < len(names) and len(found) < limit
+               and names[position][0].startswith(value)):
+            found.append(names[position][1])
+            position += 1
+        for name, pk in names:
+            if len(found) >= limit:
+                break
+            if value in name and not name.startswith(value):
+                found.append(pk)
+        return found
+
+
+ingredient_index = IngredientIndex()
+
+
+def search_ingredients(queryset, value):
+    limit = settings.INGREDIENT_SEARCH_LIMIT
+    if connection.vendor == 'postgresql':
+        return queryset.filter(name__icontains=value).annotate(
+            is_prefix=Case(
+                When(name__istartswith=value, then=Value(0)),
+                default=Value(1),
+                output_field=IntegerField()
+            )
+        ).order_by('is_prefix', 'name')[:limit]
+
+    pks = ingredient_index.search(value, limit)
+    return queryset.filter(pk__in=pks).order_by(Case(
+        *[When(pk=pk, then=Value(position))
+          for position, pk in enumerate(pks)],
+        output_field=IntegerField()
+    ))
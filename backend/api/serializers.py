@@ -1,20 +1,54 @@
 import base64
-from django.core.files.base import ContentFile
+import binascii
+from tempfile import SpooledTemporaryFile
+
+from django.core.files import File
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from rest_framework import serializers
 
 from recipe.models import (Ingredient, Recipe,
                            RecipeIngredient, Tag,
-                           Favorite)
+                           Favorite, ShoppingListItem)
+from api.fields import ThumbnailsField
+from api.images import schedule_thumbnails
+from api.metrics import serialize
+from api.shopping_cart import change_shopping_lists, get_cart_users
 from users.serializers import UserSerializer
 
 
+def get_objects_or_error(queryset, ids):
+    objects = queryset.in_bulk(ids)
+    for pk in ids:
+        if pk not in objects:
+            raise serializers.ValidationError(
+                serializers.PrimaryKeyRelatedField.default_error_messages[
+                    'does_not_exist'
+                ].format(pk_value=pk)
+            )
+    return [objects[pk] for pk in ids]
+
+
+def decode_base64(imgstr, name):
+    file = SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+    chunk_size = settings.BASE64_CHUNK_SIZE
+    try:
+        for start in range(0, len(imgstr), chunk_size):
+            file.write(base64.b64decode(imgstr[start:start + chunk_size]))
+    except binascii.Error:
+        file.close()
+        raise serializers.ValidationError('Некорректное изображение.')
+    file.seek(0)
+    return File(file, name=name)
+
+
 class Base64ImageField(serializers.ImageField):
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
             format, imgstr = data.split(';base64,')
             ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
+            data = decode_base64(imgstr, 'temp.' + ext)
 
         return super().to_internal_value(data)
 
@@ -29,9 +63,7 @@ class IngredientSerializer(serializers.ModelSerializer):
 
 
 class IngredientRecipeSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all(),
-    )
+    id = serializers.IntegerField()
     amount = serializers.IntegerField(
         max_value=settings.MAX_COOKING_TIME,
         min_value=settings.MIN_COOKING_TIME
@@ -60,7 +92,6 @@ class IngredientCreateSerializer(serializers.ModelSerializer):
 
 
 class TagSerializers(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(queryset=Tag.objects.all())
 
     class Meta:
         model = Tag
@@ -77,6 +108,7 @@ class RecipeReadSerializer(serializers.ModelSerializer):
                                              )
     tags = TagSerializers(many=True)
     image = Base64ImageField(required=False)
+    thumbnails = ThumbnailsField()
     is_favorited = serializers.BooleanField(read_only=True,
                                             default=False
                                             )
@@ -98,6 +130,7 @@ class RecipeReadSerializer(serializers.ModelSerializer):
                   'is_in_shopping_cart',
                   'name',
                   'image',
+                  'thumbnails',
                   'text',
                   'cooking_time')
 
@@ -105,10 +138,7 @@ class RecipeReadSerializer(serializers.ModelSerializer):
 class RecipeWriteSerializer(serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     ingredients = IngredientRecipeSerializer(many=True)
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(),
-        many=True
-    )
+    tags = serializers.ListField(child=serializers.IntegerField())
     image = Base64ImageField(required=False, allow_null=True)
 
     def validate_recipe(self, data):
@@ -126,21 +156,17 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 'Рецепт нельзя создать без ингредиентов!'
             )
-        names = []
-        for ingredient in data:
-            ingredient_name = ingredient.get(
-                'ingredient', {},
-            ).get(
-                'id', {},
-            ).get('name')
-            if ingredient_name:
-                names.append(ingredient_name)
-
-        if len(names) != len(set(names)):
+        ids = [ingredient['id'] for ingredient in data]
+
+        if len(ids) != len(set(ids)):
             raise serializers.ValidationError(
                 'Ингредиенты не могут повторяться!'
             )
-        return data
+        ingredients = get_objects_or_error(Ingredient.objects.all(), ids)
+        return [
+            {**ingredient, 'id': obj}
+            for ingredient, obj in zip(data, ingredients)
+        ]
 
     def validate_tags(self, data):
         if not data:
@@ -152,9 +178,11 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
                 'Теги должны быть уникальными!'
             )
 
-        return data
+        return get_objects_or_error(Tag.objects.all(), data)
 
     def create_or_update_ingredients(self, instance, ingredients_data):
+        if not ingredients_data:
+            return
 
         new_ingredients = [
             RecipeIngredient(
@@ -167,6 +195,40 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
 
         RecipeIngredient.objects.bulk_create(new_ingredients)
 
+    def diff_ingredients(self, instance, ingredients_data):
+        amounts = {
+            ingredient['id'].pk: ingredient['amount']
+            for ingredient in ingredients_data
+        }
+        current = {}
+        removed = []
+        changed = []
+        deltas = dict(amounts)
+        for item in RecipeIngredient.objects.filter(recipe=instance):
+            if item.ingredient_id is not None:
+                deltas[item.ingredient_id] = (
+                    deltas.get(item.ingredient_id, 0) - item.amount
+                )
+            if (item.ingredient_id not in amounts
+                    or item.ingredient_id in current):
+                removed.append(item.pk)
+                continue
+            current[item.ingredient_id] = item
+            if item.amount != amounts[item.ingredient_id]:
+                item.amount = amounts[item.ingredient_id]
+                changed.append(item)
+
+        if removed:
+            RecipeIngredient.objects.filter(pk__in=removed).delete()
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ['amount'])
+        self.create_or_update_ingredients(instance, [
+            ingredient for ingredient in ingredients_data
+            if ingredient['id'].pk not in current
+        ])
+        change_shopping_lists(get_cart_users(instance), deltas)
+
+    @transaction.atomic
     def create(self, validated_data):
         ingredients_data = validated_data.pop('ingredients')
         tags_data = validated_data.pop('tags')
@@ -177,33 +239,52 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
 
         recipe.tags.set(tags_data)
 
+        schedule_thumbnails(recipe)
+
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        RecipeIngredient.objects.filter(recipe=instance).delete()
-        ingredients_data = validated_data.pop('ingredients')
-        tags = validated_data.pop('tags')
+        ingredients_data = validated_data.pop('ingredients', None)
+        tags = validated_data.pop('tags', None)
 
         instance.name = validated_data.get('name', instance.name)
         instance.text = validated_data.get('text', instance.text)
         instance.cooking_time = validated_data.get(
             'cooking_time', instance.cooking_time
         )
+        image = validated_data.get('image')
+        if image:
+            instance.image = image
+            instance.thumbnails = {}
 
         instance.save()
 
-        self.create_or_update_ingredients(instance, ingredients_data)
+        if image:
+            schedule_thumbnails(instance)
+
+        if ingredients_data is not None:
+            self.diff_ingredients(instance, ingredients_data)
 
-        instance.tags.set(tags)
+        if tags is not None:
+            instance.tags.set(tags)
 
         return instance
 
     def to_representation(self, instance):
-        return RecipeReadSerializer(
+        prefetch_related_objects(
+            [instance],
+            'tags',
+            Prefetch(
+                'recipeingredient_set',
+                queryset=RecipeIngredient.objects.select_related('ingredient')
+            )
+        )
+        return serialize(RecipeReadSerializer(
             instance, context={
                 'request': self.context.get('request')
             }
-        ).data
+        ))
 
     class Meta:
         fields = ('id', 'ingredients', 'tags', 'image',
@@ -212,12 +293,35 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
 
 
 class FavoriteRecipeSerializer(serializers.ModelSerializer):
+    thumbnails = ThumbnailsField()
 
     class Meta:
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'thumbnails', 'cooking_time')
         model = Recipe
 
 
+class ShoppingListSerializer(serializers.ModelSerializer):
+    name = serializers.ReadOnlyField(source='ingredient.name')
+    measurement_unit = serializers.ReadOnlyField(
+        source='ingredient.measurement_unit'
+    )
+
+    class Meta:
+        fields = ('name', 'amount', 'measurement_unit')
+        model = ShoppingListItem
+
+
+class BatchSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.BATCH_MAX_SIZE
+    )
+
+    def validate_ids(self, value):
+        return list(dict.fromkeys(value))
+
+
 class FavoriteSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -0,0 +1,154 @@
+import csv
+import json
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Sum
+from django.http import StreamingHttpResponse
+
+from recipe.models import RecipeIngredient, ShoppingCart, ShoppingListItem
+from users.models import User
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def get_recipe_amounts(recipes):
+    return dict(RecipeIngredient.objects.filter(
+        recipe__in=recipes,
+        ingredient__isnull=False
+    ).values('ingredient').annotate(
+        total=Sum('amount')
+    ).order_by().values_list('ingredient', 'total'))
+
+
+def change_shopping_lists(users, amounts):
+    amounts = {pk: amount for pk, amount in amounts.items() if amount}
+    if not amounts:
+        return
+    users_sql, users_params = users.query.sql_with_params()
+    quote = connection.ops.quote_name
+    table = quote(ShoppingListItem._meta.db_table)
+    values = ', '.join(['(%s, %s)'] * len(amounts))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} ({quote("user_id")}, '
+            f'{quote("ingredient_id")}, {quote("amount")}) '
+            f'SELECT users.{quote("user_id")}, amounts.column1, '
+            f'amounts.column2 FROM ({users_sql}) AS users '
+            f'CROSS JOIN (VALUES {values}) AS amounts WHERE 1 = 1 '
+            f'ON CONFLICT ({quote("user_id")}, {quote("ingredient_id")}) '
+            f'DO UPDATE SET {quote("amount")} = '
+            f'{table}.{quote("amount")} + EXCLUDED.{quote("amount")}',
+            [*users_params, *(
+                value for item in amounts.items() for value in item
+            )]
+        )
+    ShoppingListItem.objects.filter(
+        user__in=users,
+        ingredient__in=amounts,
+        amount__lte=0
+    ).delete()
+
+
+def get_cart_users(recipe):
+    return ShoppingCart.objects.filter(
+        recipes=recipe
+    ).order_by().values('user_id')
+
+
+def change_shopping_list(user, recipes, sign):
+    change_shopping_lists(
+        User.objects.filter(pk=user.pk).order_by().values(user_id=F('pk')),
+        {
+            pk: amount * sign
+            for pk, amount in get_recipe_amounts(recipes).items()
+        }
+    )
+
+
+def remove_recipe_from_shopping_lists(recipe):
+    change_shopping_lists(
+        get_cart_users(recipe),
+        {
+            pk: -amount
+            for pk, amount in get_recipe_amounts([recipe]).items()
+        }
+    )
+
+
+def rebuild_shopping_lists():
+    rows = RecipeIngredient.objects.filter(
+        recipe__added_to_shopping_cart__isnull=False,
+        ingredient__isnull=False
+    ).values(
+        'recipe__added_to_shopping_cart__user', 'ingredient'
+    ).annotate(total=Sum('amount')).order_by()
+    ShoppingListItem.objects.all().delete()
+    ShoppingListItem.objects.bulk_create([
+        ShoppingListItem(
+            user_id=row['recipe__added_to_shopping_cart__user'],
+            ingredient_id=row['ingredient'],
+            amount=row['total']
+        )
+        for row in rows.iterator()
+    ], batch_size=settings.IMPORT_BATCH_SIZE)
+    return ShoppingListItem.objects.count()
+
+
+def get_shopping_cart_ingredients(user):
+    return ShoppingListItem.objects.filter(
+        user=user
+    ).values(
+        name=F('ingredient__name'),
+        measur_units=F('ingredient__measurement_unit'),
+        total=F('amount')
+    ).order_by('-name').iterator(
+        chunk_size=settings.SHOPPING_CART_CHUNK_SIZE
+    )
+
+
+def stream_txt(ingredients):
+    yield 'Список покупок:\n\n'
+    for food in ingredients:
+        yield f"{food['name']} — {food['total']} {food['measur_units']}\n"
+
+
+def stream_csv(ingredients):
+    writer = csv.writer(Echo())
+    yield writer.writerow(('name', 'amount', 'measurement_unit'))
+    for food in ingredients:
+        yield writer.writerow(
+            (food['name'], food['total'], food['measur_units'])
+        )
+
+
+def stream_jsonl(ingredients):
+    for food in ingredients:
+        yield json.dumps({
+            'name': food['name'],
+            'amount': food['total'],
+            'measurement_unit': food['measur_units'],
+        }, ensure_ascii=False) + '\n'
+
+
+EXPORT_FORMATS = {
+    'txt': (stream_txt, 'text/plain; charset=utf-8'),
+    'csv': (stream_csv, 'text/csv; charset=utf-8'),
+    'jsonl': (stream_jsonl, 'application/jsonl; charset=utf-8'),
+}
+
+
+def shopping_cart_response(user, export_format='txt'):
+    stream, content_type = EXPORT_FORMATS[export_format]
+    response = StreamingHttpResponse(
+        stream(get_shopping_cart_ingredients(user)),
+        content_type=content_type
+    )
+    response['Content-Disposition'] = (
+        'attachment; '
+        f'filename="shopping_cart.{export_format}"'
+    )
+    return response
@@ -0,0 +1,81 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.authentication import forget_tokens
+from api.cache import bump_version
+from api.metrics import install_execute_wrapper
+from api.search import ingredient_index
+from recipe.models import Favorite, Ingredient, ShoppingCart, Tag
+from users.models import Follow, User
+
+RENDERED_USER_FIELDS = ('email', 'username', 'first_name', 'last_name')
+
+
+@receiver(connection_created)
+def track_queries(sender, connection, **kwargs):
+    install_execute_wrapper(connection)
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def clear_ingredient_caches(sender, **kwargs):
+    transaction.on_commit(ingredient_index.clear)
+    bump_version('ingredients')
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def clear_tag_cache(sender, **kwargs):
+    bump_version('tags')
+
+
+@receiver(pre_save, sender=User)
+def check_rendered_user_fields(sender, instance, update_fields=None,
+                               **kwargs):
+    instance.rendered_fields_changed = False
+    if instance._state.adding or (
+        update_fields is not None
+        and not set(update_fields) & set(RENDERED_USER_FIELDS)
+    ):
+        return
+    saved = User.objects.filter(pk=instance.pk).values(
+        *RENDERED_USER_FIELDS
+    ).first()
+    instance.rendered_fields_changed = saved is not None and any(
+        saved[name] != getattr(instance, name)
+        for name in RENDERED_USER_FIELDS
+    )
+
+
+@receiver(post_save, sender=User)
+def clear_users_cache(sender, instance, **kwargs):
+    if getattr(instance, 'rendered_fields_changed', False):
+        bump_version('users')
+
+
+@receiver(post_save, sender=User)
+def forget_user_tokens(sender, instance, created=False, update_fields=None,
+                       **kwargs):
+    if created or update_fields and set(update_fields) == {'last_login'}:
+        return
+    forget_tokens(list(
+        Token.objects.filter(user=instance).values_list('key', flat=True)
+    ))
+
+
+@receiver(post_delete, sender=Token)
+def forget_token(sender, instance, **kwargs):
+    forget_tokens([instance.key])
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def clear_user_state_cache(sender, instance, **kwargs):
+    bump_version(f'user-{instance.user_id}')
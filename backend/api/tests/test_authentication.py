@@ -0,0 +1,93 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.authentication import (CachedTokenAuthentication, get_cache_key,
+                                token_cache)
+from api.tests.utils import clear_caches, create_user
+
+LOCAL_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+}
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class CachedTokenAuthenticationTest(TestCase):
+    def setUp(self):
+        clear_caches()
+        token_cache.clear()
+        self.user = create_user('reader')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {self.token.key}'
+        )
+
+    def get_me(self):
+        return self.client.get('/api/users/me/').status_code
+
+    def test_shared_cache_with_one_worker(self):
+        with override_settings(SERVER_WORKERS=1):
+            self.assertEqual(self.get_me(), 200)
+        cached = cache.get(get_cache_key(self.token.key))
+        self.assertEqual(cached, self.token)
+        self.assertEqual(cached.user, self.user)
+        self.assertIn('password', cached.user.get_deferred_fields())
+
+    def test_local_cache_with_several_workers(self):
+        with override_settings(SERVER_WORKERS=2):
+            self.assertEqual(self.get_me(), 200)
+        self.assertIsNone(cache.get(get_cache_key(self.token.key)))
+        self.assertEqual(token_cache.get(self.token.key).user, self.user)
+
+    @override_settings(SERVER_WORKERS=1)
+    def test_tokens_are_forgotten_after_commit(self):
+        key = self.token.key
+        self.assertEqual(self.get_me(), 200)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.token.delete()
+            self.assertEqual(cache.get(get_cache_key(key)).user, self.user)
+        for callback in callbacks:
+            callback()
+        self.assertIsNone(cache.get(get_cache_key(key)))
+        self.assertIsNone(token_cache.get(key))
+        self.assertEqual(self.get_me(), 401)
+
+    @override_settings(SERVER_WORKERS=1)
+    def test_password_change_forgets_tokens(self):
+        self.assertEqual(self.get_me(), 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password('new-password')
+            self.user.save()
+        self.assertIsNone(cache.get(get_cache_key(self.token.key)))
+        self.assertIsNone(token_cache.get(self.token.key))
+
+    @override_settings(SERVER_WORKERS=1)
+    def test_returns_token(self):
+        authentication = CachedTokenAuthentication()
+        for source in ('database', 'shared cache', 'local cache'):
+            with self.subTest(source=source):
+                if source == 'shared cache':
+                    token_cache.clear()
+                user, token = authentication.authenticate_credentials(
+                    self.token.key
+                )
+                self.assertEqual(user, self.user)
+                self.assertEqual(token, self.token)
+                self.assertIs(token.user, user)
+                self.assertIsNot(
+                    token, token_cache.get(self.token.key)
+                )
+
+    @override_settings(SERVER_WORKERS=1)
+    def test_set_password_with_cached_user(self):
+        self.assertEqual(self.get_me(), 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/users/set_password/', {
+                'current_password': 'password',
+                'new_password': 'Cached-token-2024',
+            })
+        self.assertEqual(response.status_code, 204)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('Cached-token-2024'))
@@ -0,0 +1,31 @@
+from django.test import SimpleTestCase, override_settings
+
+from api.checks import check_shared_cache
+
+LOCAL_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+}
+SHARED_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': '/tmp/foodgram-tests',
+    }
+}
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class SharedCacheCheckTest(SimpleTestCase):
+    def test_local_cache_with_one_worker(self):
+        with override_settings(SERVER_WORKERS=1):
+            self.assertEqual(check_shared_cache(None), [])
+
+    def test_local_cache_with_several_workers(self):
+        with override_settings(SERVER_WORKERS=2):
+            self.assertEqual(
+                [error.id for error in check_shared_cache(None)],
+                ['api.E001']
+            )
+
+    def test_shared_cache_with_several_workers(self):
+        with override_settings(SERVER_WORKERS=2, CACHES=SHARED_CACHE):
+            self.assertEqual(check_shared_cache(None), [])
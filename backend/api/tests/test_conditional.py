@@ -0,0 +1,140 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from api.tests.utils import (clear_caches, create_ingredients, create_recipe,
+                             create_tags, create_user, get_client)
+from recipe.models import Favorite, Recipe
+from users.models import User
+
+
+class ConditionalRecipeTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user('author')
+        tags = create_tags(1)
+        ingredients = create_ingredients(2)
+        for i in range(3):
+            create_recipe(author, f'Рецепт {i}', tags, ingredients)
+
+    def setUp(self):
+        clear_caches()
+        self.client = get_client()
+
+    def test_list_etag(self):
+        response = self.client.get('/api/recipes/')
+        etag = response['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                '/api/recipes/', HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 304)
+
+        Recipe.objects.order_by('-updated_at').first().delete()
+        response = self.client.get('/api/recipes/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 2)
+
+    def test_list_ignores_if_modified_since(self):
+        response = self.client.get('/api/recipes/')
+        last_modified = response['Last-Modified']
+
+        Recipe.objects.order_by('-updated_at').first().delete()
+        response = self.client.get(
+            '/api/recipes/', HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 2)
+
+    def test_detail_if_modified_since(self):
+        recipe = Recipe.objects.first()
+        response = self.client.get(f'/api/recipes/{recipe.pk}/')
+        response = self.client.get(
+            f'/api/recipes/{recipe.pk}/',
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def check_etag_after(self, change, modified):
+        etag = self.client.get('/api/recipes/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        response = self.client.get('/api/recipes/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200 if modified else 304)
+
+    def test_user_changes(self):
+        author = User.objects.get(username='author')
+
+        def set_password():
+            author.set_password('new-password')
+            author.save()
+
+        def rename(**fields):
+            def change():
+                for name, value in fields.items():
+                    setattr(author, name, value)
+                author.save(update_fields=list(fields) or None)
+            return change
+
+        for change, modified in (
+            (lambda: create_user('newcomer'), False),
+            (set_password, False),
+            (rename(), False),
+            (rename(followers_count=5), False),
+            (rename(first_name='Автор'), True),
+            (rename(username='chef'), True),
+        ):
+            with self.subTest(change=change, modified=modified):
+                self.check_etag_after(change, modified)
+
+
+class OrderedFeedETagTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.reader = create_user('reader')
+        cls.recipes = [
+            create_recipe(cls.author, f'Рецепт {i}') for i in range(3)
+        ]
+
+    def setUp(self):
+        clear_caches()
+
+    def get(self, client, ordering, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return client.get('/api/recipes/', {'ordering': ordering}, **headers)
+
+    def test_trending_rescore_changes_etag(self):
+        client = get_client()
+        etag = self.get(client, 'trending')['ETag']
+        self.assertEqual(self.get(client, 'trending', etag).status_code, 304)
+
+        Favorite.objects.create(user=self.reader, recipe=self.recipes[2])
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('update_trending', stdout=StringIO())
+        response = self.get(client, 'trending', etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()['results'][0]['id'], self.recipes[2].pk
+        )
+
+    def test_favorite_counter_changes_popular_etag(self):
+        client = get_client()
+        etag = self.get(client, 'popular')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            get_client(self.reader).post(
+                f'/api/recipes/{self.recipes[1].pk}/favorite/'
+            )
+        response = self.get(client, 'popular', etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()['results'][0]['id'], self.recipes[1].pk
+        )
+
+    def test_ordering_is_part_of_etag(self):
+        client = get_client()
+        self.assertNotEqual(
+            self.get(client, 'name')['ETag'],
+            self.get(client, '-name')['ETag']
+        )
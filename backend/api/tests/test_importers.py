@@ -0,0 +1,132 @@
+import csv
+import io
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import skipUnless
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+
+from api.importers import copy_ingredients, import_recipes
+from api.tests.utils import (clear_caches, create_ingredients, create_tags,
+                             create_user)
+from recipe.models import Ingredient, Recipe
+
+
+class ImportRecipesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.authors = [create_user(f'author{i}') for i in range(3)]
+        cls.tags = create_tags(2)
+        cls.ingredients = create_ingredients(2)
+
+    def setUp(self):
+        clear_caches()
+
+    def get_rows(self, counts):
+        return [
+            {
+                'author': author.email,
+                'name': f'Рецепт {i}',
+                'cooking_time': 10,
+                'tags': [tag.slug for tag in self.tags],
+                'ingredients': [
+                    {
+                        'name': ingredient.name,
+                        'measurement_unit': ingredient.measurement_unit,
+                        'amount': 5,
+                    }
+                    for ingredient in self.ingredients
+                ],
+            }
+            for author, count in zip(self.authors, counts)
+            for i in range(count)
+        ]
+
+    def test_recipes_count(self):
+        import_recipes(self.get_rows([3, 1, 3]), 4)
+        import_recipes(self.get_rows([4, 1, 0]), 4)
+        for author, count in zip(self.authors, [4, 1, 3]):
+            author.refresh_from_db()
+            self.assertEqual(author.recipes_count, count)
+            self.assertEqual(author.recipes.count(), count)
+        recipe = Recipe.objects.get(author=self.authors[0], name='Рецепт 3')
+        self.assertEqual(recipe.tags.count(), 2)
+        self.assertEqual(recipe.recipeingredient_set.count(), 2)
+
+
+class ImportIngredientsTest(TestCase):
+    rows = [
+        {'name': 'соль', 'measurement_unit': 'г'},
+        {'name': 'молоко', 'measurement_unit': 'мл'},
+        {'name': 'соль', 'measurement_unit': 'г'},
+        {'name': 'молоко', 'measurement_unit': 'г'},
+        {'name': 'яйца', 'measurement_unit': 'шт.'},
+    ]
+
+    def setUp(self):
+        clear_caches()
+        Ingredient.objects.create(name='соль', measurement_unit='г')
+        self.directory = TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, rows):
+        path = Path(self.directory.name) / name
+        with open(path, 'w', encoding='utf-8', newline='') as file:
+            if path.suffix == '.csv':
+                writer = csv.DictWriter(
+                    file, fieldnames=['name', 'measurement_unit']
+                )
+                writer.writeheader()
+                writer.writerows(rows)
+            elif path.suffix == '.jsonl':
+                file.writelines(
+                    json.dumps(row, ensure_ascii=False) + '\n'
+                    for row in rows
+                )
+            else:
+                json.dump(rows, file, ensure_ascii=False)
+        return str(path)
+
+    def assertIngredients(self):
+        self.assertEqual(
+            set(Ingredient.objects.values_list('name', 'measurement_unit')),
+            {(row['name'], row['measurement_unit']) for row in self.rows}
+        )
+
+    def test_import_data(self):
+        for name in ('ingredients.csv', 'ingredients.json',
+                     'ingredients.jsonl'):
+            with self.subTest(name):
+                stdout = io.StringIO()
+                call_command(
+                    'import_data', 'ingredients',
+                    self.write(name, self.rows), batch_size=2,
+                    stdout=stdout
+                )
+                self.assertIn(
+                    'ingredients: 5 rows processed', stdout.getvalue()
+                )
+                self.assertIngredients()
+
+    def test_import_data_rejects_unknown_format(self):
+        with self.assertRaises(CommandError):
+            call_command(
+                'import_data', 'ingredients',
+                self.write('ingredients.txt', [])
+            )
+
+    def test_import_ingredients(self):
+        self.write('ingredients.csv', self.rows)
+        call_command(
+            'import_ingredients', path=self.directory.name,
+            stdout=io.StringIO()
+        )
+        self.assertIngredients()
+
+    @skipUnless(connection.vendor == 'postgresql', 'COPY needs PostgreSQL')
+    def test_copy(self):
+        self.assertEqual(copy_ingredients(iter(self.rows), 2), 5)
+        self.assertIngredients()
@@ -0,0 +1,32 @@
+from django.test import TestCase, override_settings
+
+from api.search import ingredient_index
+from api.tests.utils import clear_caches, get_client
+from recipe.models import Ingredient
+
+
+@override_settings(INGREDIENT_SEARCH_LIMIT=2)
+class IngredientSearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for name in ('сахарная пудра', 'сахар', 'ванильный сахар', 'соль'):
+            Ingredient.objects.create(name=name, measurement_unit='г')
+
+    def setUp(self):
+        clear_caches()
+        ingredient_index.clear()
+
+    def test_list_is_ranked_and_limited(self):
+        response = get_client().get('/api/ingredients/', {'name': 'сахар'})
+        self.assertEqual(
+            [item['name'] for item in response.json()],
+            ['сахар', 'сахарная пудра']
+        )
+
+    def test_detail_ignores_search(self):
+        ingredient = Ingredient.objects.get(name='ванильный сахар')
+        response = get_client().get(
+            f'/api/ingredients/{ingredient.pk}/', {'name': 'сахар'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['name'], 'ванильный сахар')
@@ -0,0 +1,120 @@
+import asyncio
+import json
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from api.metrics import MetricsMiddleware, Registry, registry
+from api.tests.utils import (clear_caches, create_recipe, create_tags,
+                             create_user)
+
+
+class MetricsMiddlewareTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_tags(3)
+        create_recipe(create_user('author'), 'Рецепт')
+
+    def setUp(self):
+        clear_caches()
+        registry.clear()
+
+    def get_sums(self, view):
+        return {
+            name: sums[(view, 'GET')]
+            for name, sums in registry.sums.items()
+        }
+
+    def test_middleware_is_hybrid(self):
+        async def get_response(request):
+            pass
+
+        self.assertTrue(MetricsMiddleware.sync_capable)
+        self.assertTrue(MetricsMiddleware.async_capable)
+        self.assertTrue(asyncio.iscoroutinefunction(
+            MetricsMiddleware(get_response)
+        ))
+        self.assertFalse(asyncio.iscoroutinefunction(
+            MetricsMiddleware(lambda request: None)
+        ))
+
+    def test_sync_request(self):
+        self.client.get('/api/recipes/')
+        sums = self.get_sums('recipes-list')
+        self.assertGreater(sums['sql_queries'], 0)
+        self.assertGreater(sums['serialize_seconds'], 0)
+        self.assertGreater(sums['render_seconds'], 0)
+        self.assertLess(sums['serialize_seconds'], sums['request_seconds'])
+
+    async def test_async_request(self):
+        paths = []
+        acall = MetricsMiddleware.__acall__
+
+        async def spy(middleware, request):
+            paths.append(request.path)
+            return await acall(middleware, request)
+
+        with mock.patch.object(MetricsMiddleware, '__acall__', spy):
+            response = await self.async_client.get('/api/tags/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(paths, ['/api/tags/'])
+        sums = self.get_sums('tags-list')
+        self.assertEqual(registry.requests[('tags-list', 'GET', 200)], 1)
+        self.assertGreater(sums['sql_queries'], 0)
+        self.assertGreater(sums['serialize_seconds'], 0)
+
+
+@override_settings(METRICS_ALLOWED_IPS=['127.0.0.1', '10.0.0.0/8'],
+                   METRICS_TRUSTED_PROXIES=['172.16.0.0/12'])
+class MetricsEndpointTest(SimpleTestCase):
+    def setUp(self):
+        registry.clear()
+
+    def test_allowed_addresses(self):
+        for address, forwarded, status in (
+            ('127.0.0.1', None, 200),
+            ('10.0.0.5', None, 200),
+            ('192.168.1.10', None, 404),
+            ('172.18.0.3', '10.0.0.7', 200),
+            ('172.18.0.3', '203.0.113.9', 404),
+            ('203.0.113.9', '127.0.0.1', 404),
+        ):
+            headers = {'REMOTE_ADDR': address}
+            if forwarded:
+                headers['HTTP_X_REAL_IP'] = forwarded
+            with self.subTest(address=address, forwarded=forwarded):
+                self.assertEqual(
+                    self.client.get('/api/metrics/', **headers).status_code,
+                    status
+                )
+
+    def test_workers_are_added_up(self):
+        with TemporaryDirectory() as directory, override_settings(
+            SERVER_WORKERS=2, METRICS_DIR=directory
+        ):
+            other = Registry()
+            for _ in range(3):
+                other.observe('tags-list', 'GET', 200, {
+                    'request_seconds': 0.001, 'sql_queries': 2
+                })
+            other.flush(force=True)
+            registry.observe('tags-list', 'GET', 200, {
+                'request_seconds': 1, 'sql_queries': 5
+            })
+            output = self.client.get(
+                '/api/metrics/', REMOTE_ADDR='127.0.0.1'
+            ).content.decode()
+            files = [
+                json.loads(path.read_text())['requests']
+                for path in registry.path.parent.glob('*.json')
+            ]
+        self.assertEqual(len(files), 2)
+        for line in (
+            'foodgram_requests_total{view="tags-list",method="GET",'
+            'status="200"} 4',
+            'foodgram_sql_queries_sum{view="tags-list",method="GET"} 11',
+            'foodgram_request_duration_seconds_bucket'
+            '{view="tags-list",method="GET",le="0.005"} 3',
+        ):
+            self.assertIn(line, output)
@@ -0,0 +1,175 @@
+from unittest import mock, skipUnless
+from urllib.parse import parse_qs, urlparse
+
+from django.core import signing
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api.pagination import CountStrategyPaginator
+from api.tests.utils import (clear_caches, create_recipe, create_user,
+                             get_client)
+from recipe.models import Recipe
+
+
+@override_settings(COUNT_EXACT_THRESHOLD=2)
+class CountStrategyTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user('author')
+        for i in range(5):
+            create_recipe(author, f'Рецепт {i}')
+
+    def setUp(self):
+        clear_caches()
+
+    def get_page(self, page):
+        return get_client().get('/api/recipes/', {'page': page, 'limit': 1})
+
+    def estimate(self, count):
+        return mock.patch.multiple(
+            CountStrategyPaginator,
+            can_estimate=mock.Mock(return_value=True),
+            estimate_count=mock.Mock(return_value=count)
+        )
+
+    def test_exact_count(self):
+        with override_settings(COUNT_EXACT_THRESHOLD=10):
+            response = self.get_page(5)
+            self.assertEqual(response['X-Count-Strategy'], 'exact')
+            self.assertEqual(response.json()['count'], 5)
+            self.assertEqual(self.get_page(6).status_code, 404)
+
+    def test_underestimate_keeps_later_pages(self):
+        with self.estimate(3):
+            response = self.get_page(5)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Count-Strategy'], 'estimate')
+        self.assertEqual(response.json()['count'], 3)
+        self.assertEqual(
+            response.json()['results'][0]['name'], 'Рецепт 4'
+        )
+        with self.estimate(3):
+            self.assertEqual(self.get_page(6).status_code, 404)
+
+    def test_overestimate_rejects_empty_pages(self):
+        with self.estimate(50):
+            self.assertEqual(self.get_page(6).status_code, 404)
+            response = self.get_page(2)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 50)
+
+    def test_outdated_cached_count(self):
+        with self.estimate(3):
+            self.get_page(1)
+        create_recipe(Recipe.objects.first().author, 'Рецепт 5')
+        response = self.get_page(6)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Count-Strategy'], 'cached')
+        self.assertEqual(response.json()['count'], 3)
+
+    @skipUnless(connection.vendor == 'postgresql', 'EXPLAIN needs PostgreSQL')
+    def test_explain_estimate(self):
+        connection.cursor().execute('ANALYZE recipe_recipe')
+        paginator = CountStrategyPaginator(Recipe.objects.all(), 1)
+        self.assertGreater(paginator.count, 2)
+        self.assertEqual(paginator.count_strategy, 'estimate')
+        self.assertEqual(paginator.page(5).object_list[0].name, 'Рецепт 4')
+        self.assertGreaterEqual(
+            paginator.estimate_count(Recipe.objects.filter(name='Рецепт 1')),
+            1
+        )
+
+
+class KeysetPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user('author')
+        for i, name in enumerate('AAABBCCDD'):
+            recipe = create_recipe(author, name)
+            Recipe.objects.filter(pk=recipe.pk).update(
+                favorites_count=i % 3
+            )
+
+    def setUp(self):
+        clear_caches()
+        self.client = get_client()
+
+    def get(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        return [item['id'] for item in data['results']], data
+
+    def walk(self, params, expected):
+        pages = []
+        ids, data = self.get('/api/recipes/', {**params, 'limit': 2})
+        self.assertIsNone(data['previous'])
+        pages.append(ids)
+        while data['next']:
+            ids, data = self.get(data['next'])
+            pages.append(ids)
+        self.assertEqual(sum(pages, []), expected)
+
+        backwards = [pages[-1]]
+        while data['previous']:
+            ids, data = self.get(data['previous'])
+            backwards.append(ids)
+        self.assertEqual(backwards, pages[::-1])
+
+    def test_name_ordering_with_ties(self):
+        self.walk({}, list(
+            Recipe.objects.order_by('name', 'id').values_list('id', flat=True)
+        ))
+
+    def test_popular_ordering_with_ties(self):
+        self.walk({'ordering': 'popular'}, list(
+            Recipe.objects.order_by(
+                '-favorites_count', 'id'
+            ).values_list('id', flat=True)
+        ))
+
+    def get_next_cursor(self, params=None):
+        data = self.client.get(
+            '/api/recipes/', {**(params or {}), 'limit': 2}
+        ).json()
+        return parse_qs(urlparse(data['next']).query)['cursor'][0]
+
+    def test_tampered_cursor(self):
+        cursor = self.get_next_cursor()
+        payload, signature = cursor.split(':', 1)
+        tampered = signing.b64_encode(
+            signing.b64_decode(payload.encode()).replace(b'"A"', b'"C"')
+        ).decode()
+        for value in (f'{tampered}:{signature}', 'garbage', cursor[:-1]):
+            with self.subTest(cursor=value):
+                response = self.client.get(
+                    '/api/recipes/', {'cursor': value, 'limit': 2}
+                )
+                self.assertEqual(response.status_code, 404)
+        response = self.client.get(
+            '/api/recipes/', {'cursor': cursor, 'limit': 2}
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_ordering_fields_are_not_deferred(self):
+        self.get('/api/recipes/', {'limit': 2})
+        for ordering in ('cooking_time', '-cooking_time', 'id', 'popular',
+                         'trending', '-name'):
+            with self.subTest(ordering=ordering):
+                clear_caches()
+                with CaptureQueriesContext(connection) as default:
+                    self.get('/api/recipes/', {'limit': 2})
+                clear_caches()
+                with self.assertNumQueries(len(default)):
+                    ids, data = self.get(
+                        '/api/recipes/', {'ordering': ordering, 'limit': 2}
+                    )
+                self.assertIsNotNone(data['next'])
+
+    def test_cursor_from_another_ordering(self):
+        response = self.client.get('/api/recipes/', {
+            'cursor': self.get_next_cursor({'ordering': 'popular'}),
+            'limit': 2,
+        })
+        self.assertEqual(response.status_code, 404)
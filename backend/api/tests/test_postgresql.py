@@ -0,0 +1,142 @@
+from unittest import mock
+
+import psycopg2
+from django.test import SimpleTestCase
+from psycopg2.pool import PoolError
+
+from backend.postgresql import base
+
+SETTINGS = {
+    'ENGINE': 'backend.postgresql',
+    'NAME': 'django',
+    'USER': 'django',
+    'PASSWORD': '',
+    'HOST': '',
+    'PORT': '',
+    'OPTIONS': {},
+    'TIME_ZONE': None,
+    'AUTOCOMMIT': True,
+    'ATOMIC_REQUESTS': False,
+    'CONN_MAX_AGE': 60,
+    'CONN_HEALTH_CHECKS': True,
+    'POOL_MIN_SIZE': 0,
+    'POOL_MAX_SIZE': 2,
+}
+
+
+def make_connection():
+    return mock.Mock(isolation_level=1, closed=0)
+
+
+@mock.patch('psycopg2.extras.register_default_jsonb')
+class PooledDatabaseWrapperTest(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(base, 'ThreadedConnectionPool')
+        self.pool_class = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pool = self.pool_class.return_value
+        self.pool.getconn.side_effect = make_connection
+        self.addCleanup(base.pools.clear)
+
+    def get_wrapper(self, **settings):
+        return base.DatabaseWrapper({**SETTINGS, **settings}, 'pooled')
+
+    def test_connections_come_from_one_pool(self, register):
+        first = self.get_wrapper()
+        second = self.get_wrapper()
+        connection = first.get_new_connection({'dbname': 'django'})
+        second.get_new_connection({'dbname': 'django'})
+        self.pool_class.assert_called_once_with(0, 2, dbname='django')
+        self.assertTrue(first.pooled)
+        self.assertEqual(first.isolation_level, connection.isolation_level)
+        register.assert_called_with(conn_or_curs=mock.ANY, loads=mock.ANY)
+
+    def test_close_returns_connection_to_pool(self, register):
+        wrapper = self.get_wrapper()
+        wrapper.connection = wrapper.get_new_connection({})
+        connection = wrapper.connection
+        wrapper._close()
+        connection.rollback.assert_called_once_with()
+        connection.close.assert_not_called()
+        self.pool.putconn.assert_called_once_with(connection, close=False)
+        self.assertFalse(wrapper.pooled)
+
+    def test_broken_connection_is_discarded(self, register):
+        wrapper = self.get_wrapper()
+        for broken in ('closed', 'rollback'):
+            with self.subTest(broken=broken):
+                self.pool.putconn.reset_mock()
+                wrapper.connection = wrapper.get_new_connection({})
+                connection = wrapper.connection
+                if broken == 'closed':
+                    connection.closed = 1
+                else:
+                    connection.rollback.side_effect = psycopg2.Error
+                wrapper._close()
+                self.pool.putconn.assert_called_once_with(
+                    connection, close=True
+                )
+
+    @mock.patch.object(base.base.Database, 'connect')
+    def test_exhausted_pool_opens_direct_connection(self, connect, register):
+        connect.return_value = make_connection()
+        self.pool.getconn.side_effect = PoolError('exhausted')
+        wrapper = self.get_wrapper()
+        wrapper.connection = wrapper.get_new_connection({})
+        self.assertIs(wrapper.connection, connect.return_value)
+        self.assertFalse(wrapper.pooled)
+        wrapper._close()
+        connect.return_value.close.assert_called_once_with()
+        self.pool.putconn.assert_not_called()
+
+    @mock.patch.object(base.base.Database, 'connect')
+    def test_without_pool_size(self, connect, register):
+        connect.return_value = make_connection()
+        wrapper = self.get_wrapper(POOL_MAX_SIZE=0)
+        self.assertIs(wrapper.get_new_connection({}), connect.return_value)
+        self.pool_class.assert_not_called()
+
+
+class HealthCheckTest(SimpleTestCase):
+    def get_wrapper(self, **settings):
+        wrapper = base.DatabaseWrapper(
+            {**SETTINGS, 'POOL_MAX_SIZE': 0, **settings}, 'checked'
+        )
+        wrapper.connection = make_connection()
+        wrapper.autocommit = True
+        wrapper.is_usable = mock.Mock(return_value=True)
+        wrapper.close = mock.Mock()
+        return wrapper
+
+    def test_checked_once_per_request(self):
+        wrapper = self.get_wrapper()
+        wrapper.close_if_health_check_failed()
+        wrapper.close_if_health_check_failed()
+        wrapper.is_usable.assert_called_once_with()
+        wrapper.close.assert_not_called()
+
+        wrapper.close_if_unusable_or_obsolete()
+        wrapper.is_usable.return_value = False
+        wrapper.close_if_health_check_failed()
+        self.assertEqual(wrapper.is_usable.call_count, 2)
+        wrapper.close.assert_called_once_with()
+
+    def test_skipped(self):
+        for name, settings, in_atomic_block in (
+            ('disabled', {'CONN_HEALTH_CHECKS': False}, False),
+            ('in atomic block', {}, True),
+        ):
+            with self.subTest(name):
+                wrapper = self.get_wrapper(**settings)
+                wrapper.in_atomic_block = in_atomic_block
+                wrapper.close_if_health_check_failed()
+                wrapper.is_usable.assert_not_called()
+
+    def test_new_connection_is_not_checked(self):
+        wrapper = self.get_wrapper()
+        wrapper.connection = None
+        with mock.patch.object(base.base.DatabaseWrapper, 'connect'):
+            wrapper.connect()
+        wrapper.connection = make_connection()
+        wrapper.close_if_health_check_failed()
+        wrapper.is_usable.assert_not_called()
@@ -0,0 +1,106 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from api.serializers import RecipeWriteSerializer
+from api.shopping_cart import rebuild_shopping_lists
+from api.tests.utils import (create_ingredients, create_recipe, create_tags,
+                             create_user)
+from recipe.models import RecipeIngredient, ShoppingCart
+
+
+class RecipeIngredientDiffTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.ingredients = create_ingredients(5)
+        cls.recipe = create_recipe(
+            create_user('author'), 'Рецепт', create_tags(1),
+            cls.ingredients[:3]
+        )
+        cls.reader = create_user('reader')
+        ShoppingCart.objects.create(user=cls.reader, recipes=cls.recipe)
+        rebuild_shopping_lists()
+
+    def get_rows(self):
+        return {
+            item.ingredient_id: (item.pk, item.amount)
+            for item in RecipeIngredient.objects.filter(recipe=self.recipe)
+        }
+
+    def get_shopping_list(self):
+        return dict(self.reader.shopping_list.filter(
+            amount__gt=0
+        ).values_list('ingredient_id', 'amount'))
+
+    def update(self, amounts, queries):
+        # queries include the SAVEPOINT and RELEASE of the atomic update
+        before = self.get_rows()
+        with self.assertNumQueries(queries), CaptureQueriesContext(
+            connection
+        ) as context:
+            serializer = RecipeWriteSerializer(
+                self.recipe,
+                data={'ingredients': [
+                    {'id': ingredient.pk, 'amount': amount}
+                    for ingredient, amount in amounts
+                ]},
+                partial=True
+            )
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+            serializer.save()
+        writes = [
+            query['sql'].split()[0] for query in context.captured_queries
+            if 'recipe_recipeingredient' in query['sql']
+            and not query['sql'].startswith('SELECT')
+        ]
+        after = self.get_rows()
+        self.assertEqual(
+            {pk: amount for pk, (_, amount) in after.items()},
+            {ingredient.pk: amount for ingredient, amount in amounts}
+        )
+        self.assertEqual(
+            self.get_shopping_list(),
+            {ingredient.pk: amount for ingredient, amount in amounts}
+        )
+        kept = {
+            pk for pk, row in after.items() if before.get(pk) == row
+        }
+        return writes, kept
+
+    def test_unchanged(self):
+        first, second, third = self.ingredients[:3]
+        writes, kept = self.update(
+            [(first, 1), (second, 2), (third, 3)], 5
+        )
+        self.assertEqual(writes, [])
+        self.assertEqual(kept, {first.pk, second.pk, third.pk})
+
+    def test_changed(self):
+        first, second, third = self.ingredients[:3]
+        writes, kept = self.update(
+            [(first, 1), (second, 20), (third, 3)], 8
+        )
+        self.assertEqual(writes, ['UPDATE'])
+        self.assertEqual(kept, {first.pk, third.pk})
+
+    def test_added(self):
+        first, second, third, fourth = self.ingredients[:4]
+        writes, kept = self.update(
+            [(first, 1), (second, 2), (third, 3), (fourth, 4)], 8
+        )
+        self.assertEqual(writes, ['INSERT'])
+        self.assertEqual(kept, {first.pk, second.pk, third.pk})
+
+    def test_removed(self):
+        first, second = self.ingredients[:2]
+        writes, kept = self.update([(first, 1), (second, 2)], 8)
+        self.assertEqual(writes, ['DELETE'])
+        self.assertEqual(kept, {first.pk, second.pk})
+
+    def test_changed_added_and_removed(self):
+        first, second, _, fourth, fifth = self.ingredients
+        writes, kept = self.update(
+            [(first, 1), (second, 5), (fourth, 4), (fifth, 6)], 10
+        )
+        self.assertEqual(sorted(writes), ['DELETE', 'INSERT', 'UPDATE'])
+        self.assertEqual(kept, {first.pk})
@@ -0,0 +1,80 @@
+from django.test import TestCase, override_settings
+
+from api.tests.utils import (clear_caches, create_ingredients, create_recipe,
+                             create_tags, create_user, get_client)
+from recipe.models import Favorite, ShoppingCart
+from users.models import Follow
+
+
+class RecipeReadQueriesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        tags = create_tags(3)
+        ingredients = create_ingredients(5)
+        cls.recipes = []
+        for i in range(12):
+            author = create_user(f'author{i}')
+            cls.recipes.append(create_recipe(
+                author, f'Рецепт {i:02d}', tags[:i % 3 + 1], ingredients
+            ))
+            if i % 2:
+                Follow.objects.create(user=cls.user, author=author)
+                Favorite.objects.create(user=cls.user, recipe=cls.recipes[-1])
+        ShoppingCart.objects.create(user=cls.user, recipes=cls.recipes[0])
+
+    def setUp(self):
+        clear_caches()
+
+    def get_list(self, client, limit, queries):
+        clear_caches()
+        with self.assertNumQueries(queries):
+            response = client.get('/api/recipes/', {'limit': limit})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), limit)
+        return response
+
+    def test_list_queries_do_not_depend_on_page_size(self):
+        for compiled in (True, False):
+            with self.subTest(compiled=compiled), override_settings(
+                COMPILED_RECIPE_SERIALIZER=compiled
+            ):
+                client = get_client(self.user)
+                anonymous = get_client()
+                queries = 9 if compiled else 8
+                for limit in (1, 6, 12):
+                    self.get_list(client, limit, queries)
+                    self.get_list(anonymous, limit, queries - 3)
+
+    def test_list_uses_cached_representations(self):
+        client = get_client(self.user)
+        self.get_list(client, 6, 9)
+        with self.assertNumQueries(5):
+            response = client.get('/api/recipes/', {'limit': 6})
+        results = response.json()['results']
+        self.assertEqual(
+            [item['is_favorited'] for item in results],
+            [recipe.favorite.filter(user=self.user).exists()
+             for recipe in self.recipes[:6]]
+        )
+        self.assertEqual(
+            [item['author']['is_subscribed'] for item in results],
+            [i % 2 == 1 for i in range(6)]
+        )
+
+    def test_detail_queries(self):
+        recipe = self.recipes[1]
+        for compiled in (True, False):
+            with self.subTest(compiled=compiled), override_settings(
+                COMPILED_RECIPE_SERIALIZER=compiled
+            ):
+                clear_caches()
+                with self.assertNumQueries(6 if compiled else 5):
+                    response = get_client(self.user).get(
+                        f'/api/recipes/{recipe.pk}/'
+                    )
+                data = response.json()
+                self.assertEqual(data['id'], recipe.pk)
+                self.assertTrue(data['is_favorited'])
+                self.assertTrue(data['author']['is_subscribed'])
+                self.assertEqual(len(data['ingredients']), 5)
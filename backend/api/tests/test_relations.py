@@ -0,0 +1,88 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection, transaction
+from django.test import TransactionTestCase
+
+from api.cache import get_version
+from api.relations import add_relation
+from api.tests.utils import (clear_caches, create_ingredients, create_recipe,
+                             create_user, get_client)
+from recipe.models import Favorite, ShoppingCart
+
+PARALLEL_REQUESTS = 8
+
+
+class RelationConcurrencyTest(TransactionTestCase):
+    def setUp(self):
+        clear_caches()
+        self.user = create_user('reader')
+        self.recipe = create_recipe(
+            create_user('author'), 'Рецепт', ingredients=create_ingredients(2)
+        )
+
+    def in_thread(self, function):
+        try:
+            return function()
+        finally:
+            connection.close()
+
+    def send_in_parallel(self, method, url):
+        barrier = threading.Barrier(PARALLEL_REQUESTS)
+
+        def send():
+            barrier.wait()
+            return getattr(get_client(self.user), method)(url).status_code
+
+        with ThreadPoolExecutor(PARALLEL_REQUESTS) as executor:
+            futures = [
+                executor.submit(self.in_thread, send)
+                for _ in range(PARALLEL_REQUESTS)
+            ]
+            return sorted(future.result() for future in futures)
+
+    def check_toggle(self, action, counter):
+        url = f'/api/recipes/{self.recipe.pk}/{action}/'
+        for method, success, total in (('post', 201, 1), ('delete', 204, 0)):
+            with self.subTest(method=method):
+                self.assertEqual(
+                    self.send_in_parallel(method, url),
+                    sorted([success] + [400] * (PARALLEL_REQUESTS - 1))
+                )
+                self.recipe.refresh_from_db()
+                self.assertEqual(getattr(self.recipe, counter), total)
+
+    def test_parallel_favorite(self):
+        self.check_toggle('favorite', 'favorites_count')
+        self.assertFalse(Favorite.objects.exists())
+
+    def test_parallel_shopping_cart(self):
+        self.check_toggle('shopping_cart', 'shopping_cart_count')
+        self.assertFalse(ShoppingCart.objects.exists())
+        self.assertFalse(self.user.shopping_list.filter(
+            amount__gt=0
+        ).exists())
+
+    def test_version_is_bumped_after_commit(self):
+        name = f'user-{self.user.pk}'
+        before = get_version(name)
+        with transaction.atomic():
+            add_relation(Favorite, 'recipe', self.user, self.recipe.pk)
+            self.assertEqual(get_version(name), before)
+        self.assertGreater(get_version(name), before)
+
+    def test_etag_read_during_write_is_not_reused(self):
+        url = f'/api/recipes/{self.recipe.pk}/'
+        client = get_client(self.user)
+        client.get(url)
+        with transaction.atomic():
+            add_relation(Favorite, 'recipe', self.user, self.recipe.pk)
+            with ThreadPoolExecutor(1) as executor:
+                response = executor.submit(
+                    self.in_thread, lambda: client.get(url)
+                ).result()
+        self.assertFalse(response.json()['is_favorited'])
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['is_favorited'])
@@ -0,0 +1,116 @@
+import time
+
+from django.core.cache import cache
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api.replicas import (STICKY_COOKIE, SHARED_VERSIONS, get_sticky_key,
+                          read_database)
+from api.tests.utils import (clear_caches, create_recipe, create_tags,
+                             create_user, get_client)
+
+REPLICA = 'replica_1'
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA],
+                   DATABASE_REPLICA_STICKY_SECONDS=5)
+class ReplicaReadTest(TransactionTestCase):
+    # The replica is a test mirror of the primary: its own connection to the
+    # same test database, so the data has to be committed to be seen.
+    databases = {'default', REPLICA}
+
+    def setUp(self):
+        clear_caches()
+        self.tags = create_tags(2)
+        self.user = create_user('reader')
+        self.recipe = create_recipe(
+            create_user('author'), 'Рецепт', self.tags
+        )
+
+    def set_versions_age(self, seconds):
+        names = [*SHARED_VERSIONS, f'user-{self.user.pk}']
+        for name in names:
+            cache.set(f'version:{name}', time.time() - seconds, None)
+
+    def get_databases(self, client, url, table='recipe_recipe'):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(read_database.get())
+        captured = {'default': primary, REPLICA: replica}
+        return {
+            alias for alias, queries in captured.items()
+            if any(f'"{table}"' in query['sql'] for query in queries)
+        }
+
+    def test_reads_go_to_replica(self):
+        self.set_versions_age(60)
+        client = get_client(self.user)
+        self.assertEqual(
+            self.get_databases(client, '/api/recipes/'), {REPLICA}
+        )
+        response = client.get(f'/api/recipes/{self.recipe.pk}/')
+        self.assertEqual(response.json()['name'], 'Рецепт')
+
+    def test_fresh_versions_read_from_primary(self):
+        self.set_versions_age(60)
+        cache.set('version:tags', time.time(), None)
+        self.assertEqual(
+            self.get_databases(get_client(), '/api/recipes/'), {'default'}
+        )
+
+        self.set_versions_age(60)
+        cache.set(f'version:user-{self.user.pk}', time.time(), None)
+        self.assertEqual(
+            self.get_databases(get_client(self.user), '/api/recipes/'),
+            {'default'}
+        )
+        self.assertEqual(
+            self.get_databases(get_client(), '/api/recipes/'), {REPLICA}
+        )
+
+    def test_catalogue_is_built_on_primary(self):
+        self.set_versions_age(60)
+        self.assertEqual(
+            self.get_databases(get_client(), '/api/tags/', 'recipe_tag'),
+            {'default'}
+        )
+
+    def test_write_sets_sticky_cookie_and_user_entry(self):
+        self.set_versions_age(60)
+        client = get_client(self.user)
+        response = client.post(f'/api/recipes/{self.recipe.pk}/favorite/')
+        self.assertEqual(response.status_code, 201)
+        cookie = response.cookies[STICKY_COOKIE]
+        self.assertEqual(cookie['max-age'], 5)
+
+        self.set_versions_age(60)
+        self.assertEqual(
+            self.get_databases(client, '/api/recipes/'), {'default'}
+        )
+        client.cookies.pop(STICKY_COOKIE)
+        self.assertEqual(
+            self.get_databases(client, '/api/recipes/'), {'default'}
+        )
+        cache.delete(get_sticky_key(self.user))
+        self.assertEqual(
+            self.get_databases(client, '/api/recipes/'), {REPLICA}
+        )
+
+    def test_recipe_update_reads_own_writes(self):
+        self.recipe.author = self.user
+        self.recipe.save()
+        self.set_versions_age(60)
+        client = get_client(self.user)
+        response = client.patch(
+            f'/api/recipes/{self.recipe.pk}/', {'name': 'Новое название'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        client.cookies.pop(STICKY_COOKIE)
+        cache.delete(get_sticky_key(self.user))
+        self.assertEqual(
+            self.get_databases(client, '/api/recipes/'), {'default'}
+        )
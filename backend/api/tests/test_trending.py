@@ -0,0 +1,67 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from api.tests.utils import clear_caches, create_recipe, create_user
+from recipe.models import Favorite, Recipe, ShoppingCart
+
+
+@override_settings(TRENDING_WINDOW_DAYS=14, TRENDING_HALF_LIFE_HOURS=48)
+class UpdateTrendingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user('author')
+        cls.users = [create_user(f'user{i}') for i in range(4)]
+        cls.recipes = [
+            create_recipe(author, f'Рецепт {i}') for i in range(4)
+        ]
+
+    def setUp(self):
+        clear_caches()
+        self.now = timezone.now()
+
+    def add_events(self, model, field, events):
+        for user, recipe, days in events:
+            event = model.objects.create(
+                user=self.users[user], **{field: self.recipes[recipe]}
+            )
+            model.objects.filter(pk=event.pk).update(
+                created=self.now - timedelta(days=days)
+            )
+
+    def run_command(self, *args, days=0):
+        output = StringIO()
+        now = self.now + timedelta(days=days)
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            call_command('update_trending', *args, stdout=output)
+        return output.getvalue()
+
+    def get_scores(self):
+        return dict(Recipe.objects.values_list('pk', 'trending_score'))
+
+    def test_incremental_update_matches_full_recompute(self):
+        self.add_events(Favorite, 'recipe', [
+            (0, 0, 0.5), (1, 0, 13.5), (0, 1, 5), (1, 2, 20),
+        ])
+        self.add_events(ShoppingCart, 'recipes', [(2, 1, 1), (3, 0, 10)])
+        self.assertIn('recomputed', self.run_command())
+
+        self.add_events(Favorite, 'recipe', [(2, 3, -0.5), (3, 1, -0.2)])
+        self.assertIn('updated', self.run_command(days=1))
+        updated = self.get_scores()
+        self.assertIn('recomputed', self.run_command('--full', days=1))
+        full = self.get_scores()
+
+        self.assertEqual(full[self.recipes[2].pk], 0)
+        self.assertGreater(full[self.recipes[3].pk], 0)
+        for pk, score in full.items():
+            self.assertAlmostEqual(updated[pk], score)
+
+    def test_first_run_and_long_pause_recompute(self):
+        self.assertIn('recomputed', self.run_command())
+        self.assertIn('updated', self.run_command(days=1))
+        self.assertIn('recomputed', self.run_command(days=20))
@@ -0,0 +1,62 @@
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from api.cache import local_catalogues
+from api.counters import change_counter
+from recipe.models import Ingredient, Recipe, RecipeIngredient, Tag
+from users.models import User
+
+
+def create_user(username):
+    return User.objects.create_user(
+        username=username,
+        email=f'{username}@example.com',
+        password='password',
+        first_name=username,
+        last_name=username
+    )
+
+
+def create_tags(count):
+    return [
+        Tag.objects.create(
+            name=f'Тег {i}', color=f'#0000{i:02d}', slug=f'tag-{i}'
+        ) for i in range(count)
+    ]
+
+
+def create_ingredients(count):
+    return [
+        Ingredient.objects.create(
+            name=f'Ингредиент {i}', measurement_unit='г'
+        ) for i in range(count)
+    ]
+
+
+def create_recipe(author, name, tags=(), ingredients=()):
+    recipe = Recipe.objects.create(
+        author=author,
+        name=name,
+        text='Текст рецепта',
+        cooking_time=10,
+        image='recipes/images/test.png'
+    )
+    change_counter(User, author.pk, 'recipes_count', 1)
+    recipe.tags.set(tags)
+    RecipeIngredient.objects.bulk_create([
+        RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=i + 1)
+        for i, ingredient in enumerate(ingredients)
+    ])
+    return recipe
+
+
+def get_client(user=None):
+    client = APIClient()
+    if user is not None:
+        client.force_authenticate(user)
+    return client
+
+
+def clear_caches():
+    cache.clear()
+    local_catalogues.clear()
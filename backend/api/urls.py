@@ -1,6 +1,8 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
+from api.async_views import async_read_urls
+from api.metrics import metrics_view
 from api.views import IngridientViewSet, TagViewSet, RecipeViewSet
 
 router = DefaultRouter()
@@ -11,5 +13,6 @@ router.register('tags', TagViewSet, basename='tags')
 router.register('recipes', RecipeViewSet, basename='recipes')
 
 urlpatterns = [
-    path('', include(router.urls)),
+    path('metrics/', metrics_view, name='metrics'),
+    path('', include(async_read_urls(router.urls))),
 ]
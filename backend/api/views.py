@@ -1,45 +1,82 @@
-from django.db.models import Exists, F, OuterRef, Sum
-from django.http import HttpResponse
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, Max, OuterRef, Prefetch
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
-from rest_framework.filters import OrderingFilter
 from rest_framework.permissions import (IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
 
-from api.filters import IngredientFilter, RecipeFilter
+from api.cache import (CatalogueCacheMixin, bump_version,
+                       conditional_response, get_cached_representations,
+                       get_version, make_etag)
+from api.compiled import serialize_recipe_rows
+from api.counters import change_counter, change_counters
+from api.filters import IngredientFilter, RecipeFilter, RecipeOrderingFilter
+from api.metrics import SerializationTimingMixin, serialize
 from api.permissions import IsAuthorOrReadOnly
-from api.pagination import RecipePagination
-from api.serializers import (FavoriteSerializer, IngredientSerializer,
-                             RecipeReadSerializer, RecipeWriteSerializer,
+from api.pagination import FeedPagination
+from api.renderers import (ShoppingCartCSVRenderer,
+                           ShoppingCartJSONLinesRenderer,
+                           ShoppingCartTextRenderer)
+from api.replicas import ReplicaReadMixin
+from api.relations import (add_relation, add_relations, batch_results,
+                           remove_relation, remove_relations)
+from api.serializers import (BatchSerializer, FavoriteRecipeSerializer,
+                             IngredientSerializer, RecipeReadSerializer,
+                             RecipeWriteSerializer, ShoppingListSerializer,
                              TagSerializers)
+from api.shopping_cart import (change_shopping_list,
+                               remove_recipe_from_shopping_lists,
+                               shopping_cart_response)
+from users.models import User
+from users.serializers import get_followed_ids
 from recipe.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
                            ShoppingCart, Tag)
 
 
-class IngridientViewSet(viewsets.ModelViewSet):
+RANKING_FIELDS = ('favorites_count', 'trending_score')
+
+
+class IngridientViewSet(ReplicaReadMixin, CatalogueCacheMixin,
+                        SerializationTimingMixin, viewsets.ModelViewSet):
+    catalogue_name = 'ingredients'
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     pagination_class = None
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientFilter
 
+    def filter_queryset(self, queryset):
+        if self.action != 'list':
+            return queryset
+        return super().filter_queryset(queryset)
+
 
-class TagViewSet(viewsets.ModelViewSet):
+class TagViewSet(ReplicaReadMixin, CatalogueCacheMixin,
+                 SerializationTimingMixin, viewsets.ModelViewSet):
+    catalogue_name = 'tags'
     queryset = Tag.objects.all()
     serializer_class = TagSerializers
     pagination_class = None
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ReplicaReadMixin, SerializationTimingMixin,
+                    viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     serializer_class = RecipeReadSerializer
-    pagination_class = RecipePagination
+    pagination_class = FeedPagination
     permission_classes = [IsAuthorOrReadOnly, IsAuthenticatedOrReadOnly]
-    filter_backends = (DjangoFilterBackend, OrderingFilter)
+    filter_backends = (DjangoFilterBackend, RecipeOrderingFilter)
     filterset_class = RecipeFilter
+    ordering_fields = ('id', 'name', 'cooking_time',
+                       'favorites_count', 'trending_score')
+    lookup_value_regex = r'\d+'
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
@@ -47,10 +84,14 @@ class RecipeViewSet(viewsets.ModelViewSet):
         return RecipeWriteSerializer
 
     def get_queryset(self):
-        recipes = Recipe.objects.prefetch_related(
-            'tags',
-            'ingredients',
+        recipes = Recipe.objects.select_related(
             'author'
+        ).prefetch_related(
+            'tags',
+            Prefetch(
+                'recipeingredient_set',
+                queryset=RecipeIngredient.objects.select_related('ingredient')
+            )
         )
 
         if self.request.user.is_authenticated:
@@ -67,103 +108,264 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
         return recipes
 
+    def get_conditional_response(self, queryset, render,
+                                 use_last_modified=True, ordering=None):
+        user = self.request.user
+        state = queryset.order_by().aggregate(
+            updated_at=Max('updated_at'),
+            recipes_count=Count('pk')
+        )
+        names = ['tags', 'ingredients', 'users']
+        if user.is_authenticated:
+            names.append(f'user-{user.pk}')
+        ordering = list(ordering or ())
+        names += [
+            f'recipe-{field.lstrip("-")}' for field in ordering
+            if field.lstrip('-') in RANKING_FIELDS
+        ]
+        versions = [get_version(name) for name in names]
+        timestamps = list(versions)
+        if state['updated_at']:
+            timestamps.append(state['updated_at'].timestamp())
+        return conditional_response(
+            self.request,
+            make_etag(user.pk, ordering, state['updated_at'],
+                      state['recipes_count'], *versions),
+            max(timestamps),
+            render,
+            use_last_modified
+        )
+
+    def list(self, request, *args, **kwargs):
+        # Max(updated_at) of a list goes down when a recipe is deleted or
+        # leaves the filter, so only the ETag can answer with 304 here.
+        queryset = self.filter_queryset(Recipe.objects.all())
+        ordering = RecipeOrderingFilter().get_ordering(
+            request, queryset, self
+        )
+        return self.get_conditional_response(
+            queryset,
+            partial(self.get_feed_response, ordering),
+            use_last_modified=False,
+            ordering=ordering
+        )
+
+    def get_feed_response(self, ordering):
+        # The keyset cursor is built from the ordering fields of the last
+        # row, so they must not be deferred.
+        fields = {'pk', 'updated_at'} | {
+            field.lstrip('-') for field in ordering or Recipe._meta.ordering
+        }
+        page = self.paginate_queryset(self.filter_queryset(
+            Recipe.objects.only(*fields)
+        ))
+        versions = [
+            get_version(name) for name in ('tags', 'ingredients', 'users')
+        ]
+        host = self.request.get_host()
+        data = get_cached_representations(
+            page,
+            lambda recipe: 'recipe:{}:{}:{}'.format(
+                recipe.pk, host, make_etag(recipe.updated_at, *versions)
+            ),
+            self.serialize_recipes
+        )
+        return self.get_paginated_response(
+            self.overlay_user_flags(data)
+        )
+
+    def serialize_recipes(self, pks):
+        if settings.COMPILED_RECIPE_SERIALIZER:
+            data = serialize_recipe_rows(
+                Recipe.objects.filter(pk__in=pks), self.request
+            )
+        else:
+            data = serialize(self.get_serializer(
+                self.get_queryset().filter(pk__in=pks), many=True
+            ))
+        return {item['id']: item for item in data}
+
+    def overlay_user_flags(self, data):
+        user = self.request.user
+        favorited, in_shopping_cart = set(), set()
+        if user.is_authenticated:
+            pks = [item['id'] for item in data]
+            favorited = set(user.users_favorite.filter(
+                recipe__in=pks
+            ).values_list('recipe_id', flat=True))
+            in_shopping_cart = set(user.shopping_cart.filter(
+                recipes__in=pks
+            ).values_list('recipes_id', flat=True))
+        followed = get_followed_ids(self.request)
+        return [
+            {
+                **item,
+                'author': {
+                    **item['author'],
+                    'is_subscribed': item['author']['id'] in followed
+                },
+                'is_favorited': item['id'] in favorited,
+                'is_in_shopping_cart': item['id'] in in_shopping_cart,
+            }
+            for item in data
+        ]
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            Recipe.objects.filter(pk=kwargs['pk']),
+            partial(self.get_detail_response, request, *args, **kwargs)
+        )
+
+    def get_detail_response(self, request, *args, **kwargs):
+        if not settings.COMPILED_RECIPE_SERIALIZER:
+            return super().retrieve(request, *args, **kwargs)
+        data = serialize_recipe_rows(
+            self.filter_queryset(self.get_queryset()).filter(pk=kwargs['pk']),
+            request
+        )
+        if not data:
+            raise Http404
+        return Response(data[0])
+
+    @transaction.atomic
     def perform_create(self, serializer):
+        change_counter(User, self.request.user.pk, 'recipes_count', 1)
+        bump_version(f'user-{self.request.user.pk}')
         return serializer.save(author=self.request.user)
 
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        bump_version(f'user-{self.request.user.pk}')
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        change_counter(User, instance.author_id, 'recipes_count', -1)
+        remove_recipe_from_shopping_lists(instance)
+        instance.delete()
+
+    def relation_error(self, pk, message):
+        get_object_or_404(Recipe, pk=pk)
+        return Response({'message': message},
+                        status=status.HTTP_400_BAD_REQUEST
+                        )
+
     @action(methods=['post', 'delete'],
             detail=True, permission_classes=[IsAuthenticated]
             )
+    @transaction.atomic
     def favorite(self, request, pk):
-        user = request.user
-        recipe = get_object_or_404(Recipe, pk=pk)
-        favorite, created = Favorite.objects.get_or_create(
-            user=user,
-            recipe=recipe
-        )
-
         if request.method == 'POST':
-            if created:
-                serializer = FavoriteSerializer(favorite,
-                                                context={'request': request}
-                                                )
-                return Response(serializer.data,
-                                status=status.HTTP_201_CREATED
-                                )
-            return Response({'message': 'Рецепт уже в избранном!'},
-                            status=status.HTTP_400_BAD_REQUEST
+            if not add_relation(Favorite, 'recipe', request.user, pk):
+                return self.relation_error(pk, 'Рецепт уже в избранном!')
+            change_counter(Recipe, pk, 'favorites_count', 1)
+            serializer = FavoriteRecipeSerializer(
+                Recipe.objects.get(pk=pk),
+                context={'request': request}
+            )
+            return Response(serialize(serializer),
+                            status=status.HTTP_201_CREATED
                             )
 
-        if request.method == 'DELETE':
-            favorite = get_object_or_404(
-                Favorite,
-                user=request.user,
-                recipe=get_object_or_404(Recipe, pk=pk)
-            )
-            self.perform_destroy(favorite)
-            return Response(status=status.HTTP_204_NO_CONTENT)
+        if not remove_relation(Favorite, 'recipe', request.user, pk):
+            return self.relation_error(pk, 'Рецепта нет в избранном!')
+        change_counter(Recipe, pk, 'favorites_count', -1)
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=True, methods=('post', 'delete',),
             permission_classes=(IsAuthenticated,)
             )
+    @transaction.atomic
     def shopping_cart(self, request, pk):
-        recipe = get_object_or_404(Recipe, pk=pk)
-        obj_exists = request.user.shopping_cart.filter(
-            recipes=recipe
-        ).first()
-
         if request.method == 'POST':
-            if obj_exists:
-                return Response(
-                    {'message': 'Рецепт уже находится в списке покупок!'},
-                    status=status.HTTP_400_BAD_REQUEST
+            if not add_relation(ShoppingCart, 'recipes', request.user, pk):
+                return self.relation_error(
+                    pk, 'Рецепт уже находится в списке покупок!'
                 )
-
-            ShoppingCart.objects.create(user=request.user, recipes=recipe)
+            change_counter(Recipe, pk, 'shopping_cart_count', 1)
+            change_shopping_list(request.user, [pk], 1)
             return Response(
                 {'message': 'Рецепт добавлен в список покупок'},
                 status=status.HTTP_201_CREATED
             )
 
-        if request.method == 'DELETE':
-            if not obj_exists:
-                return Response(
-                    {'message': 'Рецепт уже удален из списка покупок'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+        if not remove_relation(ShoppingCart, 'recipes', request.user, pk):
+            return self.relation_error(
+                pk, 'Рецепт уже удален из списка покупок'
+            )
+        change_counter(Recipe, pk, 'shopping_cart_count', -1)
+        change_shopping_list(request.user, [pk], -1)
+        return Response(
+            {'message': 'Рецепт удален из списка покупок'},
+            status=status.HTTP_204_NO_CONTENT
+        )
 
-            obj_exists.delete()
-            return Response(
-                {'message': 'Рецепт удален из списка покупок'},
-                status=status.HTTP_204_NO_CONTENT
+    def batch_relation(self, request, model, field, counter, messages):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        if request.method == 'POST':
+            changed = add_relations(model, field, request.user, ids)
+            delta, success = 1, (status.HTTP_201_CREATED, messages[0])
+            failure = messages[1]
+        else:
+            changed = remove_relations(model, field, request.user, ids)
+            delta, success = -1, (status.HTTP_204_NO_CONTENT, messages[2])
+            failure = messages[3]
+        change_counters(Recipe, changed, counter, delta)
+        if model is ShoppingCart:
+            change_shopping_list(request.user, changed, delta)
+        missing = [pk for pk in ids if pk not in changed]
+        found = set(Recipe.objects.filter(
+            pk__in=missing
+        ).values_list('pk', flat=True)) if missing else set()
+        return Response(
+            {'results': batch_results(ids, changed, found, success, failure)}
+        )
+
+    @action(detail=False, methods=['post', 'delete'], url_path='favorite',
+            permission_classes=[IsAuthenticated]
             )
+    @transaction.atomic
+    def favorite_batch(self, request):
+        return self.batch_relation(
+            request, Favorite, 'recipe', 'favorites_count',
+            ('Рецепт добавлен в избранное', 'Рецепт уже в избранном!',
+             'Рецепт удален из избранного', 'Рецепта нет в избранном!')
+        )
 
-    @action(detail=False, methods=['get'],
-            permission_classes=[IsAuthenticated])
-    def download_shopping_cart(self, request):
-        user = request.user
-        shopping_cart = user.shopping_cart.all()
-        recipes_in_shopping_cart = [item.recipes for item in shopping_cart]
+    @action(detail=False, methods=['post', 'delete'],
+            url_path='shopping_cart', permission_classes=[IsAuthenticated]
+            )
+    @transaction.atomic
+    def shopping_cart_batch(self, request):
+        return self.batch_relation(
+            request, ShoppingCart, 'recipes', 'shopping_cart_count',
+            ('Рецепт добавлен в список покупок',
+             'Рецепт уже находится в списке покупок!',
+             'Рецепт удален из списка покупок',
+             'Рецепт уже удален из списка покупок')
+        )
 
-        ingredients_info = RecipeIngredient.objects.filter(
-            recipe__in=recipes_in_shopping_cart
+    @action(detail=False, methods=['get'],
+            permission_classes=[IsAuthenticated]
+            )
+    def shopping_list(self, request):
+        serializer = ShoppingListSerializer(
+            request.user.shopping_list.select_related(
+                'ingredient'
+            ).order_by('ingredient__name'),
+            many=True
         )
-        ingredients_info = ingredients_info.values(
-            'ingredient__name',
-            'ingredient__measurement_unit'
-        ).annotate(
-            name=F('ingredient__name'),
-            measur_units=F('ingredient__measurement_unit'),
-            total=Sum('amount')
-        ).order_by('-name')
-
-        text = 'Список покупок:\n\n' + '\n'.join([
-            (f"{food['name']} — {food['total']} {food['measur_units']}")
-            for food in ingredients_info
-        ])
-
-        response = HttpResponse(text, content_type='application/txt')
-        response['Content-Disposition'] = (
-            'attachment; '
-            'filename="shopping_cart.txt"'
+        return Response(serialize(serializer))
+
+    @action(detail=False, methods=['get'],
+            permission_classes=[IsAuthenticated],
+            renderer_classes=[ShoppingCartTextRenderer,
+                              ShoppingCartCSVRenderer,
+                              ShoppingCartJSONLinesRenderer]
+            )
+    def download_shopping_cart(self, request):
+        return shopping_cart_response(
+            request.user,
+            request.accepted_renderer.format
         )
-        return response
@@ -0,0 +1,82 @@
+import threading
+
+import psycopg2.extras
+from django.db.backends.postgresql import base
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+def get_pool(alias, settings_dict, conn_params):
+    max_size = int(settings_dict.get('POOL_MAX_SIZE') or 0)
+    if not max_size:
+        return None
+    with pools_lock:
+        if alias not in pools:
+            pools[alias] = ThreadedConnectionPool(
+                int(settings_dict.get('POOL_MIN_SIZE') or 0),
+                max_size,
+                **conn_params
+            )
+        return pools[alias]
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    health_check_done = False
+    pooled = False
+
+    def get_new_connection(self, conn_params):
+        pool = get_pool(self.alias, self.settings_dict, conn_params)
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        try:
+            connection = pool.getconn()
+        except PoolError:
+            self.pooled = False
+            return super().get_new_connection(conn_params)
+        self.pooled = True
+        options = self.settings_dict['OPTIONS']
+        self.isolation_level = options.get(
+            'isolation_level', connection.isolation_level
+        )
+        if self.isolation_level != connection.isolation_level:
+            connection.set_session(isolation_level=self.isolation_level)
+        psycopg2.extras.register_default_jsonb(
+            conn_or_curs=connection, loads=lambda x: x
+        )
+        return connection
+
+    def _close(self):
+        if not self.pooled or self.connection is None:
+            return super()._close()
+        broken = bool(self.connection.closed)
+        if not broken:
+            try:
+                self.connection.rollback()
+            except psycopg2.Error:
+                broken = True
+        self.pooled = False
+        pools[self.alias].putconn(self.connection, close=broken)
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def close_if_health_check_failed(self):
+        if (self.connection is None
+                or not self.settings_dict.get('CONN_HEALTH_CHECKS')
+                or self.health_check_done
+                or self.in_atomic_block):
+            return
+        if not self.is_usable():
+            self.close()
+        self.health_check_done = True
+
+    def _cursor(self, name=None):
+        self.close_if_health_check_failed()
+        return super()._cursor(name)
+
+    def close_if_unusable_or_obsolete(self):
+        self.health_check_done = False
+        super().close_if_unusable_or_obsolete()
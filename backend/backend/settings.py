@@ -1,4 +1,5 @@
 import os
+import sys
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -29,11 +30,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.replicas.StickyWritesMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -61,12 +64,49 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'backend.postgresql',
         'NAME': os.getenv('POSTGRES_DB', 'django'),
         'USER': os.getenv('POSTGRES_USER', 'django'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', ''),
-        'PORT': os.getenv('DB_PORT', 5432)
+        'PORT': os.getenv('DB_PORT', 5432),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': os.getenv(
+            'DB_CONN_HEALTH_CHECKS', 'True'
+        ) == 'True',
+        'POOL_MIN_SIZE': int(os.getenv('DB_POOL_MIN_SIZE', 0)),
+        'POOL_MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', 0)),
+    }
+}
+
+DATABASE_REPLICAS = []
+for number, host in enumerate(
+    filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), 1
+):
+    DATABASE_REPLICAS.append(f'replica_{number}')
+    DATABASES[f'replica_{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Tests always get a replica alias: the test runner points it at the test
+# copy of the primary over a connection of its own.
+if sys.argv[1:2] == ['test'] and 'replica_1' not in DATABASES:
+    DATABASES['replica_1'] = {
+        **DATABASES['default'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
     }
 }
 
@@ -117,7 +157,12 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
+    ],
+
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ],
 
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
@@ -155,3 +200,46 @@ MIN_COOKING_TIME = 1
 MAX_COOKING_TIME = 32000
 TAG_MAX_LENGTH = 50
 NAME_MAX_LENGTH = 150
+SHOPPING_CART_CHUNK_SIZE = 1000
+INGREDIENT_SEARCH_LIMIT = 50
+CATALOGUE_CACHE_TIMEOUT = 60 * 60 * 24
+RECIPE_CACHE_TIMEOUT = 60 * 60
+IMPORT_BATCH_SIZE = 5000
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', 2))
+BASE64_CHUNK_SIZE = 64 * 1024
+RECIPE_IMAGE_QUALITY = 80
+RECIPE_IMAGE_SIZES = {
+    'small': ('150x150', {'crop': 'center'}),
+    'medium': ('480x480', {'crop': 'center'}),
+    'large': ('1200', {'upscale': False}),
+}
+COUNT_EXACT_THRESHOLD = 1000
+COUNT_CACHE_TIMEOUT = 60
+TRENDING_HALF_LIFE_HOURS = 48
+TRENDING_WINDOW_DAYS = 14
+TRENDING_FAVORITE_WEIGHT = 1.0
+TRENDING_SHOPPING_CART_WEIGHT = 0.5
+TRENDING_BATCH_SIZE = 5000
+BATCH_MAX_SIZE = 100
+SERVER_MODE = os.getenv('SERVER_MODE', 'wsgi')
+SERVER_WORKERS = int(os.getenv('GUNICORN_WORKERS', 1))
+ASYNC_READ_THREADS = int(os.getenv('ASYNC_READ_THREADS', 16))
+METRICS_ALLOWED_IPS = os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1').split(',')
+METRICS_TRUSTED_PROXIES = list(filter(
+    None, os.getenv('METRICS_TRUSTED_PROXIES', '').split(',')
+))
+METRICS_DIR = os.getenv('METRICS_DIR', BASE_DIR / 'metrics')
+METRICS_FLUSH_SECONDS = float(os.getenv('METRICS_FLUSH_SECONDS', 1))
+DUPLICATE_QUERY_THRESHOLD = int(os.getenv('DUPLICATE_QUERY_THRESHOLD', 3))
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+PROFILE_SLOW_MS = int(os.getenv('PROFILE_SLOW_MS', 500))
+PROFILE_DIR = os.getenv('PROFILE_DIR', BASE_DIR / 'profiles')
+COMPILED_RECIPE_SERIALIZER = os.getenv(
+    'COMPILED_RECIPE_SERIALIZER', 'True'
+) == 'True'
+DATABASE_REPLICA_STICKY_SECONDS = int(
+    os.getenv('DB_REPLICA_STICKY_SECONDS', 5)
+)
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv('AUTH_TOKEN_CACHE_SIZE', 10000))
+AUTH_TOKEN_LOCAL_TTL = int(os.getenv('AUTH_TOKEN_LOCAL_TTL', 5))
+AUTH_TOKEN_CACHE_TIMEOUT = int(os.getenv('AUTH_TOKEN_CACHE_TIMEOUT', 300))
@@ -0,0 +1,25 @@
+import os
+import shutil
+
+bind = '0.0.0.0:8080'
+workers = int(os.getenv('GUNICORN_WORKERS', 1))
+
+if os.getenv('SERVER_MODE') == 'asgi':
+    wsgi_app = 'backend.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'backend.wsgi:application'
+
+
+def on_starting(server):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command('check')
+
+    from django.conf import settings
+
+    # Workers of the previous run left their metrics files behind.
+    shutil.rmtree(settings.METRICS_DIR, ignore_errors=True)
@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count, Min, Sum
+
+
+def merge_recipe_ingredients(RecipeIngredient, ingredient_id):
+    duplicates = RecipeIngredient.objects.filter(
+        ingredient_id=ingredient_id
+    ).values('recipe_id').annotate(
+        keep_id=Min('id'), total=Count('id'), amount=Sum('amount')
+    ).filter(total__gt=1).order_by()
+    for duplicate in duplicates:
+        RecipeIngredient.objects.filter(pk=duplicate['keep_id']).update(
+            amount=min(duplicate['amount'], settings.MAX_COOKING_TIME)
+        )
+        RecipeIngredient.objects.filter(
+            recipe_id=duplicate['recipe_id'],
+            ingredient_id=ingredient_id
+        ).exclude(pk=duplicate['keep_id']).delete()
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    Ingredient = apps.get_model('recipe', 'Ingredient')
+    RecipeIngredient = apps.get_model('recipe', 'RecipeIngredient')
+    duplicates = Ingredient.objects.values(
+        'name', 'measurement_unit'
+    ).annotate(
+        keep_id=Min('id'), total=Count('id')
+    ).filter(total__gt=1).order_by()
+    for duplicate in duplicates:
+        extra = Ingredient.objects.filter(
+            name=duplicate['name'],
+            measurement_unit=duplicate['measurement_unit']
+        ).exclude(id=duplicate['keep_id'])
+        RecipeIngredient.objects.filter(ingredient__in=extra).update(
+            ingredient_id=duplicate['keep_id']
+        )
+        merge_recipe_ingredients(RecipeIngredient, duplicate['keep_id'])
+        extra.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0005_recipe_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop
+        ),
+    ]
@@ -21,6 +21,12 @@ class Ingredient(models.Model):
 
     class Meta:
         ordering = ('name',)
+        constraints = [
+            models.UniqueConstraint(
+                name='unique_ingredient',
+                fields=['name', 'measurement_unit']
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -93,9 +99,49 @@ class Recipe(models.Model):
         through='RecipeTag',
         verbose_name='Тэг'
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='В избранном'
+    )
+    shopping_cart_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='В списках покупок'
+    )
+    trending_score = models.FloatField(
+        default=0,
+        verbose_name='Популярность'
+    )
+    thumbnails = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='Миниатюры'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name='Дата изменения'
+    )
 
     class Meta:
         ordering = ('name',)
+        indexes = [
+            models.Index(
+                fields=['name', 'id'],
+                name='recipe_name_id_idx'
+            ),
+            models.Index(
+                fields=['author', 'name'],
+                name='recipe_author_name_idx'
+            ),
+            models.Index(
+                fields=['-favorites_count', 'id'],
+                name='recipe_popular_idx'
+            ),
+            models.Index(
+                fields=['-trending_score', 'id'],
+                name='recipe_trending_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -144,6 +190,12 @@ class RecipeTag(models.Model):
 
     class Meta:
         ordering = ('recipe',)
+        indexes = [
+            models.Index(
+                fields=['recipe', 'tag'],
+                name='recipetag_recipe_tag_idx'
+            ),
+        ]
 
     def __str__(self):
         return 'Тег {} выбран к рецепту {}.'.format(
@@ -164,6 +216,11 @@ class Favorite(models.Model):
         related_name='favorite',
         verbose_name='Избранный рецепт'
     )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Дата добавления'
+    )
 
     class Meta:
         constraints = [
@@ -190,6 +247,11 @@ class ShoppingCart(models.Model):
         related_name='added_to_shopping_cart',
         verbose_name='Рецепт'
     )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Дата добавления'
+    )
 
     class Meta:
         constraints = [
@@ -201,3 +263,36 @@ class ShoppingCart(models.Model):
 
     def str(self):
         return 'Рецепт {} добавлен в список покупок'.format(self.recipes.name)
+
+
+class ShoppingListItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list',
+        verbose_name='Пользователь'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Ингредиент'
+    )
+    amount = models.IntegerField(
+        default=0,
+        verbose_name='Количество'
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                name='unique_shopping_list_ingredient',
+                fields=['user', 'ingredient']
+            ),
+        ]
+
+    def __str__(self):
+        return '{}: {} {}'.format(
+            self.ingredient.name, self.amount,
+            self.ingredient.measurement_unit
+        )
@@ -1,9 +1,20 @@
 from rest_framework import serializers
 
+from api.fields import ThumbnailsField
 from users.models import Follow, User
 from recipe.models import Recipe
 
 
+def get_followed_ids(request):
+    if request is None or not request.user.is_authenticated:
+        return set()
+    if not hasattr(request, 'followed_ids'):
+        request.followed_ids = set(
+            request.user.follower.values_list('author_id', flat=True)
+        )
+    return request.followed_ids
+
+
 class UserSerializer(serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField(read_only=True)
 
@@ -19,21 +30,23 @@ class UserSerializer(serializers.ModelSerializer):
         )
 
     def get_is_subscribed(self, obj):
-        user = self.context['request'].user.id
-        return Follow.objects.filter(user=user, author=obj).exists()
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        return obj.id in get_followed_ids(self.context.get('request'))
 
 
 class SubscribeRecipeSerializer(serializers.ModelSerializer):
+    thumbnails = ThumbnailsField()
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'thumbnails', 'cooking_time')
 
 
 class SubscriptionUserSerializer(serializers.ModelSerializer):
     is_subscribed = serializers.BooleanField(read_only=True)
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = User
@@ -52,10 +65,6 @@ class SubscriptionUserSerializer(serializers.ModelSerializer):
         recipes = obj.recipes.all()
         return SubscribeRecipeSerializer(recipes, many=True).data
 
-    def get_recipes_count(self, obj):
-        recipes = Recipe.objects.filter(author=obj)
-        return recipes.count()
-
     def get_is_subscribed(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
@@ -0,0 +1,155 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from api.tests.utils import (clear_caches, create_recipe, create_user,
+                             get_client)
+from users.models import Follow, User
+
+PARALLEL_REQUESTS = 8
+
+
+class UserListQueriesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        for i in range(10):
+            author = create_user(f'author{i}')
+            if i % 2:
+                Follow.objects.create(user=cls.user, author=author)
+
+    def setUp(self):
+        clear_caches()
+
+    def test_list_queries_do_not_depend_on_page_length(self):
+        client = get_client(self.user)
+        subscribed = {}
+        for page in (1, 2):
+            with self.subTest(page=page), self.assertNumQueries(2):
+                response = client.get('/api/users/', {'page': page})
+            self.assertEqual(response.status_code, 200)
+            subscribed.update(
+                (item['username'], item['is_subscribed'])
+                for item in response.json()['results']
+            )
+        self.assertEqual(len(subscribed), 11)
+        self.assertEqual(subscribed['author1'], True)
+        self.assertEqual(subscribed['author2'], False)
+        self.assertEqual(subscribed['reader'], False)
+
+
+class SubscriptionRecipesLimitTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        for i in range(4):
+            author = create_user(f'author{i}')
+            Follow.objects.create(user=cls.user, author=author)
+            for j in range(3):
+                create_recipe(author, f'Рецепт {i}-{j}')
+
+    def setUp(self):
+        clear_caches()
+
+    def get_subscriptions(self, queries, **params):
+        with self.assertNumQueries(queries):
+            response = get_client(self.user).get(
+                '/api/users/subscriptions/', params
+            )
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def test_recipes_limit(self):
+        for recipes_limit, expected, queries in (
+            ('0', 0, 1), ('2', 2, 2), ('5', 3, 2),
+            ('abc', 3, 2), ('-1', 3, 2), (None, 3, 2)
+        ):
+            params = {}
+            if recipes_limit is not None:
+                params['recipes_limit'] = recipes_limit
+            with self.subTest(recipes_limit=recipes_limit):
+                results = self.get_subscriptions(queries, **params)
+                self.assertEqual(len(results), 4)
+                for author in results:
+                    self.assertEqual(len(author['recipes']), expected)
+                    self.assertEqual(author['recipes_count'], 3)
+                    self.assertTrue(author['is_subscribed'])
+
+    def test_queries_do_not_depend_on_page_size(self):
+        for limit in (1, 4):
+            with self.subTest(limit=limit):
+                results = self.get_subscriptions(
+                    2, limit=limit, recipes_limit=2
+                )
+                self.assertEqual(len(results), limit)
+
+    def test_page_number_queries(self):
+        results = self.get_subscriptions(3, page=1, recipes_limit=1)
+        self.assertEqual(
+            [len(author['recipes']) for author in results], [1] * 4
+        )
+
+
+class SubscribeConcurrencyTest(TransactionTestCase):
+    def setUp(self):
+        clear_caches()
+        self.user = create_user('reader')
+        self.authors = [create_user(f'author{i}') for i in range(3)]
+
+    def in_parallel(self, send):
+        barrier = threading.Barrier(PARALLEL_REQUESTS)
+
+        def run():
+            try:
+                barrier.wait()
+                return send(get_client(self.user))
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(PARALLEL_REQUESTS) as executor:
+            futures = [
+                executor.submit(run) for _ in range(PARALLEL_REQUESTS)
+            ]
+            return [future.result() for future in futures]
+
+    def test_parallel_subscribe_and_unsubscribe(self):
+        author = self.authors[0]
+        url = f'/api/users/{author.pk}/subscribe/'
+        for method, success, failure, total in (
+            ('post', 201, 200, 1), ('delete', 204, 404, 0)
+        ):
+            with self.subTest(method=method):
+                statuses = self.in_parallel(
+                    lambda client: getattr(client, method)(url).status_code
+                )
+                self.assertEqual(
+                    sorted(statuses),
+                    sorted([success] + [failure] * (PARALLEL_REQUESTS - 1))
+                )
+                author.refresh_from_db()
+                self.assertEqual(author.followers_count, total)
+
+    def test_subscribe_to_missing_user(self):
+        response = get_client(self.user).post('/api/users/0/subscribe/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_parallel_batches_count_each_follow_once(self):
+        ids = [author.pk for author in self.authors]
+        results = [
+            item for items in self.in_parallel(
+                lambda client: client.post(
+                    '/api/users/subscribe/', {'ids': ids}, format='json'
+                ).json()['results']
+            ) for item in items
+        ]
+        created = [item['id'] for item in results if item['status'] == 201]
+        self.assertEqual(sorted(created), sorted(ids))
+        self.assertEqual(
+            list(User.objects.filter(pk__in=ids).values_list(
+                'followers_count', flat=True
+            )),
+            [1] * len(ids)
+        )
+        self.assertEqual(Follow.objects.filter(user=self.user).count(), 3)
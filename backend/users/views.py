@@ -1,3 +1,6 @@
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch, Subquery
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet
 from rest_framework import status
@@ -6,55 +9,120 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 
 from .models import Follow, User
+from api.counters import change_counter, change_counters
+from api.metrics import SerializationTimingMixin, serialize
+from api.pagination import SubscriptionFeedPagination
+from api.relations import (add_relation, add_relations, batch_results,
+                           remove_relation, remove_relations)
+from api.serializers import BatchSerializer
+from recipe.models import Recipe
 from users.serializers import (UserSerializer, SubscriptionUserSerializer)
 
 
-class UserView(UserViewSet):
+class UserView(SerializationTimingMixin, UserViewSet):
     queryset = User.objects.all()
     permission_classes = (AllowAny,)
     serializer_class = UserSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        if user.is_authenticated:
+            queryset = queryset.annotate(
+                is_subscribed=Exists(
+                    Follow.objects.filter(user=user, author=OuterRef('pk'))
+                )
+            )
+        return queryset
+
     @action(
         detail=False,
         methods=['get'],
-        permission_classes=[IsAuthenticated]
+        permission_classes=[IsAuthenticated],
+        pagination_class=SubscriptionFeedPagination
     )
     def subscriptions(self, request):
-        return self.get_paginated_response(
+        recipes = Recipe.objects.all()
+        recipes_limit = request.query_params.get('recipes_limit')
+        if recipes_limit and recipes_limit.isdigit():
+            recipes = recipes.filter(pk__in=Subquery(
+                Recipe.objects.filter(
+                    author=OuterRef('author')
+                ).values('pk')[:int(recipes_limit)]
+            ))
+        authors = self.get_queryset().filter(
+            following__user=request.user
+        ).order_by('username').prefetch_related(
+            Prefetch('recipes', queryset=recipes)
+        )
+        return self.get_paginated_response(serialize(
             SubscriptionUserSerializer(
-                self.paginate_queryset(
-                    User.objects.filter(following__user=request.user)
-                ),
+                self.paginate_queryset(authors),
                 many=True,
                 context={'request': request},
-            ).data
-        )
+            )
+        ))
 
     @action(
         detail=True,
         methods=['post'],
         permission_classes=[IsAuthenticated]
     )
+    @transaction.atomic
     def subscribe(self, request, id):
-        follow, created = Follow.objects.get_or_create(
-            user=request.user,
-            author_id=id
-        )
-        if created:
+        if add_relation(Follow, 'author', request.user, id):
+            change_counter(User, id, 'followers_count', 1)
             return Response(
                 {'detail': 'Вы подписались на пользователя'},
                 status=status.HTTP_201_CREATED
             )
+        get_object_or_404(User, pk=id)
         return Response(
             {'detail': 'Вы уже подписаны на пользователя'},
             status=status.HTTP_200_OK
         )
 
     @subscribe.mapping.delete
+    @transaction.atomic
     def delete_subscribe(self, request, id):
-        follow = get_object_or_404(Follow, user=request.user, author=id)
-        follow.delete()
+        if not remove_relation(Follow, 'author', request.user, id):
+            raise Http404
+        change_counter(User, id, 'followers_count', -1)
         return Response(
             {'detail': 'Вы отписались от пользователя'},
             status=status.HTTP_204_NO_CONTENT
         )
+
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        url_path='subscribe',
+        permission_classes=[IsAuthenticated]
+    )
+    @transaction.atomic
+    def subscribe_batch(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        user = request.user
+        if request.method == 'POST':
+            changed = add_relations(Follow, 'author', user, ids)
+            delta = 1
+            success = (
+                status.HTTP_201_CREATED, 'Вы подписались на пользователя'
+            )
+            failure = 'Вы уже подписаны на пользователя'
+        else:
+            changed = remove_relations(Follow, 'author', user, ids)
+            delta = -1
+            success = (
+                status.HTTP_204_NO_CONTENT, 'Вы отписались от пользователя'
+            )
+            failure = 'Вы не подписаны на пользователя'
+        change_counters(User, changed, 'followers_count', delta)
+        missing = [pk for pk in ids if pk not in changed]
+        found = set(User.objects.filter(
+            pk__in=missing
+        ).values_list('pk', flat=True)) if missing else set()
+        results = batch_results(ids, changed, found, success, failure)
+        return Response({'results': results})